@@ -3,55 +3,97 @@ from __future__ import annotations
 import importlib
 import importlib.util
 import json
+import os
 import signal
+import sys
 import traceback
-from collections import deque
 from contextlib import nullcontext
 from pathlib import Path
-from typing import Any
+from types import ModuleType
+from typing import IO, Any
 
 import click
-import yaml
 from click import echo
-from typing_extensions import Iterable
+from typing_extensions import Iterable, Iterator
 
-from patchwork.common.client.patched import PatchedClient
 from patchwork.common.constants import PROMPT_TEMPLATE_FILE_KEY
 from patchwork.logger import init_cli_logger, logger
 
+
+def _yaml_loads(content: bytes) -> Any:
+    # yaml is only needed when reading config files, import it on first use
+    import yaml
+
+    # prefer the libyaml backed loader when pyyaml was built with it
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content, Loader=loader)
+
+
+def _yaml_dump(data: Any, stream: IO[str]) -> None:
+    # yaml is only needed when writing yaml output, import it on first use
+    import yaml
+
+    # prefer the libyaml backed dumper, the safe dumpers cannot represent the Path values in inputs
+    dumper = getattr(yaml, "CDumper", yaml.Dumper)
+    yaml.dump(data, stream, Dumper=dumper)
+
+
 _DATA_FORMAT_MAPPING = {
-    "yaml": yaml.dump,
-    "json": json.dumps,
+    "yaml": _yaml_dump,
+    "json": json.dump,
 }
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
 
 _CONFIG_NAME = "config.yml"
 _PROMPT_NAME = "prompt.json"
 _PATCHFLOW_MODULE_NAME = "patchwork.patchflows"
+# built-in patchflows, kept in sync with patchwork/patchflows so --list does not need to scan the package
+_BUILTIN_PATCHFLOWS = (
+    "AutoFix",
+    "DependencyUpgrade",
+    "GenerateDocstring",
+    "GenerateREADME",
+    "GenerateUnitTests",
+    "PRReview",
+    "ResolveIssue",
+)
+# module path -> (st_mtime_ns, module) of the last load of that file
+_PATCHFLOW_MODULE_CACHE: dict[str, tuple[int, ModuleType]] = {}
 
 
-def _get_patchflow_names(base_path: Path | str | None) -> Iterable[str]:
+def _get_patchflow_names(base_path: str | None) -> Iterator[str]:
     """Retrieve patchflow names from a specified directory path.
     
     Args:
-        base_path (Path | str | None): The path to the directory from which to retrieve the patchflow names. 
-                                         Can be a Path object, a string representing the path, or None.
+        base_path (str | None): The path to the directory from which to retrieve the patchflow names, or None.
     
     Returns:
-        Iterable[str]: A sorted list of patchflow names derived from subdirectories that contain a corresponding 
+        Iterator[str]: The unsorted patchflow names derived from subdirectories that contain a corresponding 
                        Python file named '<subdirectory_name>.py'.
     """
-    names = []
-    if base_path is None:
-        return names
+    if base_path is None or not os.path.isdir(base_path):
+        return
+
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if entry.is_dir() and os.path.isfile(os.path.join(entry.path, f"{entry.name}.py")):
+                yield entry.name
+
 
-    base_path = Path(base_path)
-    if not base_path.is_dir():
-        return names
+def _get_file_names(base_path: str) -> set[str]:
+    """Retrieve the names of the files directly inside a directory with a single directory scan.
 
-    for path in base_path.iterdir():
-        if path.is_dir() and (path / f"{path.name}.py").is_file():
-            names.append(path.name)
-    return sorted(names)
+    Args:
+        base_path str: The path to the directory to scan.
+
+    Returns:
+        set[str]: The names of the files in the directory, or an empty set if the directory does not exist.
+    """
+    try:
+        with os.scandir(base_path) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return set()
 
 
 def list_option_callback(ctx: click.Context, param: click.Parameter, value: str | None) -> None:
@@ -71,17 +113,50 @@ def list_option_callback(ctx: click.Context, param: click.Parameter, value: str
     if not value or ctx.resilient_parsing:
         return
 
-    patchflows = []
-    default_path = Path(__file__).parent / "patchflows"
-    patchflows.extend(_get_patchflow_names(default_path))
+    patchflows = set(_BUILTIN_PATCHFLOWS)
 
     config_path = ctx.params.get("config")
-    patchflows.extend(_get_patchflow_names(config_path))
+    patchflows.update(_get_patchflow_names(config_path))
 
-    echo("\n".join(patchflows), color=ctx.color)
+    echo("\n".join(sorted(patchflows)), color=ctx.color)
     ctx.exit()
 
 
+def _is_file_path(module_path: str) -> bool:
+    """Checks whether a possible module path points to a python file rather than a dotted module name.
+
+    Args:
+        module_path str: The possible module path.
+
+    Returns:
+        bool: True if the path should be loaded as a file, False if it should be imported as a module.
+    """
+    if module_path.endswith(".py") or os.sep in module_path:
+        return True
+    return os.altsep is not None and os.altsep in module_path
+
+
+def _load_module_from_file(module_path: str) -> ModuleType:
+    """Loads a python module from a file path, reusing the module loaded previously if the file is unchanged.
+
+    Args:
+        module_path str: The path to the python file to load.
+
+    Returns:
+        ModuleType: The loaded module.
+    """
+    mtime_ns = os.stat(module_path).st_mtime_ns
+    cached = _PATCHFLOW_MODULE_CACHE.get(module_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    spec = importlib.util.spec_from_file_location("custom_module", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _PATCHFLOW_MODULE_CACHE[module_path] = (mtime_ns, module)
+    return module
+
+
 def find_patchflow(possible_module_paths: Iterable[str], patchflow: str) -> Any | None:
     """Attempts to find and load a specified patchflow from a list of possible module paths.
     
@@ -93,25 +168,29 @@ def find_patchflow(possible_module_paths: Iterable[str], patchflow: str) -> Any
         Any | None: The found patchflow object if successful; otherwise, returns None.
     """
     for module_path in possible_module_paths:
-        try:
-            spec = importlib.util.spec_from_file_location("custom_module", module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            logger.info(f'Patchflow `{patchflow}` loaded from "{module_path}"')
-            return getattr(module, patchflow)
-        except AttributeError:
-            logger.debug(f"Patchflow {patchflow} not found in {module_path}")
-        except Exception:
-            logger.debug(f"Patchflow {patchflow} not found as a file/directory in {module_path}")
-
-        try:
+        if _is_file_path(module_path):
+            if not os.path.isfile(module_path):
+                logger.debug(f"Patchflow {patchflow} not found as a file in {module_path}")
+                continue
+            module = _load_module_from_file(module_path)
+        else:
+            try:
+                spec = importlib.util.find_spec(module_path)
+            except (ModuleNotFoundError, ValueError):
+                # the parent package of a dotted path does not exist
+                spec = None
+            if spec is None:
+                logger.debug(f"Patchflow {patchflow} not found as a module in {module_path}")
+                continue
             module = importlib.import_module(module_path)
-            logger.info(f"Patchflow {patchflow} loaded from {module_path}")
-            return getattr(module, patchflow)
-        except ModuleNotFoundError:
-            logger.debug(f"Patchflow {patchflow} not found as a module in {module_path}")
-        except AttributeError:
+
+        patchflow_class = getattr(module, patchflow, None)
+        if patchflow_class is None:
             logger.debug(f"Patchflow {patchflow} not found in {module_path}")
+            continue
+
+        logger.info(f'Patchflow `{patchflow}` loaded from "{module_path}"')
+        return patchflow_class
 
     return None
 
@@ -142,7 +221,7 @@ def setup_cli():
             None
         """
         logger.info("Received SIGINT, exiting")
-        exit(1)
+        sys.exit(1)
 
     signal.signal(signal.SIGINT, sigint_handler)
 
@@ -231,13 +310,13 @@ def cli(
 
     init_cli_logger(log)
 
-    if "::" in patchflow:
-        module_path, _, patchflow_name = patchflow.partition("::")
-    else:
+    module_path, separator, patchflow_name = patchflow.partition("::")
+    if not separator:
         patchflow_name = patchflow
         module_path = _PATCHFLOW_MODULE_NAME
 
-    possbile_module_paths = deque((module_path,))
+    # custom patchflow files from the config directory take precedence over the module
+    possible_module_paths: list[str] = []
 
     panel = logger.panel("Initializing Patchwork CLI") if debug else nullcontext()
 
@@ -248,29 +327,32 @@ def cli(
 
         if config is not None:
             logger.info(f"Using given config value: {config}")
-            config_path = Path(config)
-            if config_path.is_file():
-                inputs = yaml.safe_load(config_path.read_text()) or {}
+            if os.path.isfile(config):
+                with open(config, "rb") as fp:
+                    inputs = _yaml_loads(fp.read()) or {}
                 logger.info(f"Input values loaded from {config}")
-            elif config_path.is_dir():
-                patchwork_path = config_path / patchflow_name
-
-                patchwork_python_path = patchwork_path / f"{patchflow_name}.py"
-                if patchwork_python_path.is_file():
-                    possbile_module_paths.appendleft(str(patchwork_python_path.resolve()))
-
-                patchwork_config_path = patchwork_path / _CONFIG_NAME
-                if patchwork_config_path.is_file():
-                    inputs = yaml.safe_load(patchwork_config_path.read_text()) or {}
+            elif os.path.isdir(config):
+                patchwork_path = os.path.join(config, patchflow_name)
+                patchwork_files = _get_file_names(patchwork_path)
+
+                patchwork_python_name = f"{patchflow_name}.py"
+                if patchwork_python_name in patchwork_files:
+                    patchwork_python_path = os.path.abspath(os.path.join(patchwork_path, patchwork_python_name))
+                    possible_module_paths.append(patchwork_python_path)
+
+                patchwork_config_path = os.path.join(patchwork_path, _CONFIG_NAME)
+                if _CONFIG_NAME in patchwork_files:
+                    with open(patchwork_config_path, "rb") as fp:
+                        inputs = _yaml_loads(fp.read()) or {}
                     logger.info(f"Input values loaded from {patchwork_config_path}")
                 else:
                     logger.debug(
                         f'Config file "{patchwork_config_path}" not found from directory {config}, using default config'
                     )
 
-                patchwork_prompt_path = patchwork_path / _PROMPT_NAME
-                if patchwork_prompt_path.is_file():
-                    inputs[PROMPT_TEMPLATE_FILE_KEY] = patchwork_prompt_path
+                patchwork_prompt_path = os.path.join(patchwork_path, _PROMPT_NAME)
+                if _PROMPT_NAME in patchwork_files:
+                    inputs[PROMPT_TEMPLATE_FILE_KEY] = Path(patchwork_prompt_path)
                     logger.info(f"Prompt template loaded from {patchwork_prompt_path}")
                 else:
                     logger.debug(
@@ -283,21 +365,16 @@ def cli(
         if debug:
             inputs["debug"] = True
 
-        patchflow_class = find_patchflow(possbile_module_paths, patchflow_name)
+        possible_module_paths.append(module_path)
+        patchflow_class = find_patchflow(possible_module_paths, patchflow_name)
         if patchflow_class is None:
-            logger.error(f"Patchflow {patchflow_name} not found in {possbile_module_paths}")
+            logger.error(f"Patchflow {patchflow_name} not found in {possible_module_paths}")
             exit(1)
 
     for opt in opts:
-        key, equal_sign, value = opt.partition("=")
-        key = key.lstrip("-")
-
-        if equal_sign == "":
-            # treat --key as a flag
-            inputs[key] = True
-        else:
-            # treat --key=value as a key-value pair
-            inputs[key] = value
+        key, equal_sign, value = opt.lstrip("-").partition("=")
+        # treat --key as a flag and --key=value as a key-value pair
+        inputs[key] = value if equal_sign else True
 
     patchflow_panel = nullcontext() if debug else logger.panel(f"Patchflow {patchflow} inputs")
 
@@ -305,11 +382,16 @@ def cli(
         if debug is True:
             logger.info("DEBUGGING ENABLED. INPUTS WILL BE SHOWN BEFORE EACH STEP BEFORE PROCEEDING TO RUN IT.")
         try:
-            patched = PatchedClient(inputs.get("patched_api_key"))
-            if not disable_telemetry:
+            if disable_telemetry:
+                telemetry = nullcontext()
+            else:
+                from patchwork.common.client.patched import PatchedClient
+
+                patched = PatchedClient(inputs.get("patched_api_key"))
                 patched.send_public_telemetry(patchflow_name, inputs)
+                telemetry = patched.patched_telemetry(patchflow_name, {})
 
-            with patched.patched_telemetry(patchflow_name, {}):
+            with telemetry:
                 patchflow_instance = patchflow_class(inputs)
                 patchflow_instance.run()
         except Exception as e:
@@ -318,9 +400,9 @@ def cli(
             exit(1)
 
     if output is not None:
-        serialize = _DATA_FORMAT_MAPPING.get(data_format, json.dumps)
-        with open(output, "w") as file:
-            file.write(serialize(inputs))
+        serialize = _DATA_FORMAT_MAPPING.get(data_format, json.dump)
+        with open(output, "w", buffering=_OUTPUT_BUFFER_SIZE) as file:
+            serialize(inputs, file)
 
 
 if __name__ == "__main__":
@@ -12,6 +12,8 @@ from patchwork.logger import logger
 
 
 class AioLlmClient(LlmClient):
+    __slots__ = ("_clients", "_supported_models", "_model_to_client", "_client_names_repr")
+
     def __init__(self, *clients: LlmClient):
         """Initializes an instance of the class, accepting a variable number of LlmClient instances.
         
@@ -21,15 +23,40 @@ class AioLlmClient(LlmClient):
         Returns:
             None: This method does not return a value but sets up the internal state of the instance.
         """
-        self.__original_clients = clients
-        self.__clients = []
-        self.__supported_models = set()
+        self._client_names_repr = repr([client.__class__.__name__ for client in clients])
+        self._clients = []
+        supported_models = set()
         for client in clients:
             try:
-                self.__supported_models.update(client.get_models())
-                self.__clients.append(client)
+                supported_models.update(client.get_models())
+                self._clients.append(client)
             except Exception:
                 pass
+        self._supported_models = frozenset(supported_models)
+        # model -> client resolved on first use, None if no client supports the model
+        self._model_to_client: dict[str, LlmClient | None] = {}
+
+    def _get_client(self, model: str) -> LlmClient | None:
+        """Finds the first client supporting the given model, memoizing the result.
+
+        Args:
+            model str: The name of the model to find a client for.
+
+        Returns:
+            LlmClient | None: The client to dispatch the model to, or None if no client supports it.
+        """
+        try:
+            return self._model_to_client[model]
+        except KeyError:
+            pass
+
+        found = None
+        for client in self._clients:
+            if client.is_model_supported(model):
+                found = client
+                break
+        self._model_to_client[model] = found
+        return found
 
     def get_models(self) -> set[str]:
         """Retrieves the set of supported models.
@@ -40,7 +67,7 @@ class AioLlmClient(LlmClient):
         Returns:
             set[str]: A set containing the names of the supported models.
         """
-        return self.__supported_models
+        return self._supported_models
 
     def is_model_supported(self, model: str) -> bool:
         """Checks if a specified model is supported by any of the clients.
@@ -51,7 +78,7 @@ class AioLlmClient(LlmClient):
         Returns:
             bool: True if the model is supported by any client, otherwise False.
         """
-        return any(client.is_model_supported(model) for client in self.__clients)
+        return self._get_client(model) is not None
 
     def is_prompt_supported(self, messages: Iterable[ChatCompletionMessageParam], model: str) -> int:
         """Checks if the specified prompt is supported by any of the clients for the given model.
@@ -63,10 +90,10 @@ class AioLlmClient(LlmClient):
         Returns:
             int: Returns the support level of the prompt for the model, or -1 if no client supports the model.
         """
-        for client in self.__clients:
-            if client.is_model_supported(model):
-                return client.is_prompt_supported(messages, model)
-        return -1
+        client = self._get_client(model)
+        if client is None:
+            return -1
+        return client.is_prompt_supported(messages, model)
 
     def truncate_messages(
         self, messages: Iterable[ChatCompletionMessageParam], model: str
@@ -80,10 +107,14 @@ class AioLlmClient(LlmClient):
         Returns:
             Iterable[ChatCompletionMessageParam]: An iterable of truncated chat messages if a supported client is found; otherwise, the original messages.
         """
-        for client in self.__clients:
-            if client.is_model_supported(model):
-                return client.truncate_messages(messages, model)
-        return messages
+        messages = list(messages)
+        if len(messages) == 0:
+            return messages
+
+        client = self._get_client(model)
+        if client is None:
+            return messages
+        return client.truncate_messages(messages, model)
 
     def chat_completion(
         self,
@@ -121,26 +152,25 @@ class AioLlmClient(LlmClient):
         Returns:
             ChatCompletion: The generated chat completion response based on the input messages.
         """
-        for client in self.__clients:
-            if client.is_model_supported(model):
-                logger.debug(f"Using {client.__class__.__name__} for model {model}")
-                return client.chat_completion(
-                    messages,
-                    model,
-                    frequency_penalty,
-                    logit_bias,
-                    logprobs,
-                    max_tokens,
-                    n,
-                    presence_penalty,
-                    response_format,
-                    stop,
-                    temperature,
-                    top_logprobs,
-                    top_p,
-                )
-        client_names = [client.__class__.__name__ for client in self.__original_clients]
+        client = self._get_client(model)
+        if client is not None:
+            logger.debug(f"Using {client.__class__.__name__} for model {model}")
+            input_kwargs = dict(
+                frequency_penalty=frequency_penalty,
+                logit_bias=logit_bias,
+                logprobs=logprobs,
+                max_tokens=max_tokens,
+                n=n,
+                presence_penalty=presence_penalty,
+                response_format=response_format,
+                stop=stop,
+                temperature=temperature,
+                top_logprobs=top_logprobs,
+                top_p=top_p,
+            )
+            given_kwargs = {key: value for key, value in input_kwargs.items() if value is not NOT_GIVEN}
+            return client.chat_completion(messages, model, **given_kwargs)
         raise ValueError(
-            f"Model {model} is not supported by {client_names} clients. "
+            f"Model {model} is not supported by {self._client_names_repr} clients. "
             f"Please ensure that the respective API keys are correct."
         )
@@ -4,23 +4,40 @@ import json
 import time
 from functools import lru_cache
 
-from anthropic import Anthropic
+import tiktoken
+from anthropic import Anthropic, AsyncAnthropic
 from anthropic.types import Message, TextBlockParam
 from openai.types.chat import (
     ChatCompletion,
+    ChatCompletionChunk,
     ChatCompletionMessage,
     ChatCompletionMessageParam,
     completion_create_params,
 )
-from openai.types.chat.chat_completion import Choice, CompletionUsage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
 from openai.types.chat.chat_completion_message_tool_call import (
     ChatCompletionMessageToolCall,
     Function,
 )
 from openai.types.completion_usage import CompletionUsage
-from typing_extensions import Dict, Iterable, List, Optional, Union
+from typing_extensions import Any, Dict, Iterable, Iterator, List, Optional, Union
 
 from patchwork.common.client.llm.protocol import NOT_GIVEN, LlmClient, NotGiven
+from patchwork.common.client.llm.utils import ResponseCache
+
+_STOP_REASON_MAP = {"end_turn": "stop", "max_tokens": "length", "stop_sequence": "stop", "tool_use": "tool_calls"}
+
+
+@lru_cache(maxsize=None)
+def _get_encoding() -> tiktoken.Encoding:
+    """Loads the tokenizer used to approximate Anthropic token counts locally.
+
+    Returns:
+        tiktoken.Encoding: The cl100k_base encoding.
+    """
+    return tiktoken.get_encoding("cl100k_base")
 
 
 def _anthropic_to_openai_response(model: str, anthropic_response: Message) -> ChatCompletion:
@@ -33,8 +50,6 @@ def _anthropic_to_openai_response(model: str, anthropic_response: Message) -> Ch
     Returns:
         ChatCompletion: An OpenAI ChatCompletion object that encapsulates the converted response and related metadata.
     """
-    stop_reason_map = {"end_turn": "stop", "max_tokens": "length", "stop_sequence": "stop", "tool_use": "tool_calls"}
-
     choices = []
     for i, content_block in enumerate(anthropic_response.content):
         if content_block.type == "text":
@@ -55,11 +70,13 @@ def _anthropic_to_openai_response(model: str, anthropic_response: Message) -> Ch
             )
         choice = Choice(
             index=i,
-            finish_reason=stop_reason_map.get(anthropic_response.stop_reason, "stop"),
+            finish_reason=_STOP_REASON_MAP.get(anthropic_response.stop_reason, "stop"),
             message=chat_completion_message,
         )
         choices.append(choice)
 
+    output_tokens = anthropic_response.usage.output_tokens
+    input_tokens = anthropic_response.usage.input_tokens
     return ChatCompletion(
         id=anthropic_response.id,
         choices=choices,
@@ -67,17 +84,18 @@ def _anthropic_to_openai_response(model: str, anthropic_response: Message) -> Ch
         model=model,
         object="chat.completion",
         usage=CompletionUsage(
-            completion_tokens=anthropic_response.usage.output_tokens,
-            prompt_tokens=anthropic_response.usage.input_tokens,
-            total_tokens=anthropic_response.usage.output_tokens + anthropic_response.usage.input_tokens,
+            completion_tokens=output_tokens,
+            prompt_tokens=input_tokens,
+            total_tokens=output_tokens + input_tokens,
         ),
     )
 
 
 class AnthropicLlmClient(LlmClient):
     __allowed_model_prefix = "claude-3-"
-    __definitely_allowed_models = {"claude-2.0", "claude-2.1", "claude-instant-1.2"}
-    __100k_models = {"claude-2.0", "claude-instant-1.2"}
+    __definitely_allowed_models = frozenset({"claude-2.0", "claude-2.1", "claude-instant-1.2"})
+    __100k_models = frozenset({"claude-2.0", "claude-instant-1.2"})
+    __models = __definitely_allowed_models | {f"{__allowed_model_prefix}*"}
 
     def __init__(self, api_key: str):
         """Initializes an instance of the class with the provided API key.
@@ -89,6 +107,8 @@ class AnthropicLlmClient(LlmClient):
             None: This constructor does not return a value.
         """
         self.client = Anthropic(api_key=api_key)
+        self.__aclient = AsyncAnthropic(api_key=api_key)
+        self.__response_cache = ResponseCache()
 
     def __get_model_limit(self, model: str) -> int:
         # it is observed that the count tokens is not accurate, so we are using a safety margin
@@ -106,7 +126,6 @@ class AnthropicLlmClient(LlmClient):
             return 100_000 - safety_margin
         return 200_000 - safety_margin
 
-    @lru_cache(maxsize=None)
     def get_models(self) -> set[str]:
         """Retrieves a set of model names by combining definitely allowed models 
         with the allowed model prefix.
@@ -118,7 +137,7 @@ class AnthropicLlmClient(LlmClient):
             set[str]: A set of model names including both explicitly allowed models 
             and those that match the allowed model prefix.
         """
-        return self.__definitely_allowed_models.union(set(f"{self.__allowed_model_prefix}*"))
+        return self.__models
 
     def is_model_supported(self, model: str) -> bool:
         """Checks if the specified model is supported.
@@ -142,15 +161,27 @@ class AnthropicLlmClient(LlmClient):
             int: The remaining token count if within the limit, or -1 if the total exceeds the model's limit.
         """
         model_limit = self.__get_model_limit(model)
+        encoding = _get_encoding()
         token_count = 0
         for message in messages:
-            message_token_count = self.client.count_tokens(message.get("content"))
+            message_token_count = len(encoding.encode_ordinary(message.get("content") or ""))
             token_count = token_count + message_token_count
             if token_count > model_limit:
                 return -1
 
         return model_limit - token_count
 
+    def _get_encoding(self, model: str) -> tiktoken.Encoding | None:
+        """Retrieves the tokenizer used to count the prompt tokens of the model.
+        
+        Args:
+            model str: The name of the model whose tokenizer is requested.
+        
+        Returns:
+            tiktoken.Encoding | None: The encoding approximating the tokenizer of Anthropic models.
+        """
+        return _get_encoding()
+
     def truncate_messages(
         self, messages: Iterable[ChatCompletionMessageParam], model: str
     ) -> Iterable[ChatCompletionMessageParam]:
@@ -165,6 +196,72 @@ class AnthropicLlmClient(LlmClient):
         """
         return self._truncate_messages(self, messages, model)
 
+    def __create_message_kwargs(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        max_tokens: Optional[int] | NotGiven,
+        response_format: completion_create_params.ResponseFormat | NotGiven,
+        stop: Union[Optional[str], List[str]] | NotGiven,
+        temperature: Optional[float] | NotGiven,
+        top_p: Optional[float] | NotGiven,
+    ) -> dict[str, Any]:
+        """Builds the arguments of the Anthropic messages API from OpenAI style chat completion parameters.
+
+        Args:
+            messages Iterable[ChatCompletionMessageParam]: The messages of the conversation, including system messages.
+            model str: The model to use for generating the chat completion.
+            max_tokens Optional[int] | NotGiven: The maximum number of tokens to generate in the completion.
+            response_format completion_create_params.ResponseFormat | NotGiven: The format in which to return the response.
+            stop Union[Optional[str], List[str]] | NotGiven: A stop sequence or sequences where the response generation will halt.
+            temperature Optional[float] | NotGiven: A sampling temperature to control randomness in the output.
+            top_p Optional[float] | NotGiven: A value to control diversity through nucleus sampling.
+
+        Returns:
+            dict[str, Any]: The keyword arguments for `messages.create`, without the arguments that were not given or None.
+        """
+        messages = list(messages)
+        system: Union[str, Iterable[TextBlockParam]] | NotGiven = [
+            TextBlockParam(text=message.get("content"), type="text")
+            for message in messages
+            if message.get("role") == "system"
+        ] or NOT_GIVEN
+        other_messages = [message for message in messages if message.get("role") != "system"]
+
+        # claude-3 models support prompt caching, mark the end of the static prefix so it is not prefilled again
+        is_prompt_caching_supported = model.startswith(self.__allowed_model_prefix)
+        if is_prompt_caching_supported and system is not NOT_GIVEN:
+            system[-1]["cache_control"] = dict(type="ephemeral")
+
+        default_max_token = 1000
+        input_kwargs = dict(
+            messages=other_messages,
+            max_tokens=default_max_token if max_tokens is None or max_tokens is NOT_GIVEN else max_tokens,
+            model=model,
+        )
+        optional_kwargs = (
+            ("system", system),
+            ("stop_sequences", [stop] if isinstance(stop, str) else stop),
+            ("temperature", temperature),
+            ("top_p", top_p),
+        )
+        input_kwargs.update(
+            (key, value) for key, value in optional_kwargs if value is not NOT_GIVEN and value is not None
+        )
+        if response_format is not NOT_GIVEN and response_format.get("type") == "json_schema":
+            input_kwargs["tool_choice"] = dict(type="tool", name="response_format")
+            input_kwargs["tools"] = [
+                dict(
+                    name="response_format",
+                    description="The response format to use",
+                    input_schema=response_format["json_schema"]["schema"],
+                )
+            ]
+            if is_prompt_caching_supported:
+                input_kwargs["tools"][-1]["cache_control"] = dict(type="ephemeral")
+
+        return input_kwargs
+
     def chat_completion(
         self,
         messages: Iterable[ChatCompletionMessageParam],
@@ -201,35 +298,164 @@ class AnthropicLlmClient(LlmClient):
         Returns:
             ChatCompletion: The generated chat completion response containing the response text and other related data.
         """
-        system: Union[str, Iterable[TextBlockParam]] | NotGiven = NOT_GIVEN
-        other_messages = []
-        for message in messages:
-            if message.get("role") == "system":
-                if system is NOT_GIVEN:
-                    system = list()
-                system.append(TextBlockParam(text=message.get("content"), type="text"))
-            else:
-                other_messages.append(message)
+        payload = self.__create_message_kwargs(messages, model, max_tokens, response_format, stop, temperature, top_p)
 
-        default_max_token = 1000
-        input_kwargs = dict(
-            messages=other_messages,
-            system=system,
-            max_tokens=default_max_token if max_tokens is None or max_tokens is NOT_GIVEN else max_tokens,
-            model=model,
-            stop_sequences=[stop] if isinstance(stop, str) else stop,
-            temperature=temperature,
-            top_p=top_p,
-        )
+        # only deterministic requests are cached, sampled responses are expected to differ between calls
+        cache_key = ResponseCache.key(payload) if temperature == 0 else None
+        if cache_key is not None:
+            cached_response = self.__response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        response = self.client.messages.create(**payload)
+        completion = _anthropic_to_openai_response(model, response)
+        if cache_key is not None:
+            self.__response_cache.put(cache_key, completion)
+        return completion
+
+    async def achat_completion(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        frequency_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        logit_bias: Optional[Dict[str, int]] | NotGiven = NOT_GIVEN,
+        logprobs: Optional[bool] | NotGiven = NOT_GIVEN,
+        max_tokens: Optional[int] | NotGiven = NOT_GIVEN,
+        n: Optional[int] | NotGiven = NOT_GIVEN,
+        presence_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        response_format: completion_create_params.ResponseFormat | NotGiven = NOT_GIVEN,
+        stop: Union[Optional[str], List[str]] | NotGiven = NOT_GIVEN,
+        temperature: Optional[float] | NotGiven = NOT_GIVEN,
+        top_logprobs: Optional[int] | NotGiven = NOT_GIVEN,
+        top_p: Optional[float] | NotGiven = NOT_GIVEN,
+    ) -> ChatCompletion:
+        """Asynchronously generates a chat completion response, allowing several requests to run concurrently.
+        
+        Args:
+            messages Iterable[ChatCompletionMessageParam]: A collection of messages to be processed, including system and user messages.
+            model str: The model to use for generating the chat completion.
+            frequency_penalty Optional[float] | NotGiven: (Optional) A penalty applied to frequency of words.
+            logit_bias Optional[Dict[str, int]] | NotGiven: (Optional) A bias applied to specific tokens.
+            logprobs Optional[bool] | NotGiven: (Optional) Whether to include log probabilities of the tokens.
+            max_tokens Optional[int] | NotGiven: (Optional) The maximum number of tokens to generate in the completion.
+            n Optional[int] | NotGiven: (Optional) The number of completions to generate for each prompt.
+            presence_penalty Optional[float] | NotGiven: (Optional) A penalty applied to presence of words in the chat.
+            response_format completion_create_params.ResponseFormat | NotGiven: (Optional) The format in which to return the response.
+            stop Union[Optional[str], List[str]] | NotGiven: (Optional) A stop sequence or sequences where the response generation will halt.
+            temperature Optional[float] | NotGiven: (Optional) A sampling temperature to control randomness in the output.
+            top_logprobs Optional[int] | NotGiven: (Optional) The number of log probabilities to include for the most likely tokens.
+            top_p Optional[float] | NotGiven: (Optional) A value to control diversity through nucleus sampling.
+        
+        Returns:
+            ChatCompletion: The generated chat completion response containing the response text and other related data.
+        """
+        payload = self.__create_message_kwargs(messages, model, max_tokens, response_format, stop, temperature, top_p)
+
+        # only deterministic requests are cached, sampled responses are expected to differ between calls
+        cache_key = ResponseCache.key(payload) if temperature == 0 else None
+        if cache_key is not None:
+            cached_response = self.__response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        response = await self.__aclient.messages.create(**payload)
+        completion = _anthropic_to_openai_response(model, response)
+        if cache_key is not None:
+            self.__response_cache.put(cache_key, completion)
+        return completion
+
+    def stream_chat_completion(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        frequency_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        logit_bias: Optional[Dict[str, int]] | NotGiven = NOT_GIVEN,
+        logprobs: Optional[bool] | NotGiven = NOT_GIVEN,
+        max_tokens: Optional[int] | NotGiven = NOT_GIVEN,
+        n: Optional[int] | NotGiven = NOT_GIVEN,
+        presence_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        response_format: completion_create_params.ResponseFormat | NotGiven = NOT_GIVEN,
+        stop: Union[Optional[str], List[str]] | NotGiven = NOT_GIVEN,
+        temperature: Optional[float] | NotGiven = NOT_GIVEN,
+        top_logprobs: Optional[int] | NotGiven = NOT_GIVEN,
+        top_p: Optional[float] | NotGiven = NOT_GIVEN,
+    ) -> Iterator[ChatCompletionChunk]:
+        """Generates a chat completion response, yielding the text as it is received from the model.
+        
+        Args:
+            messages Iterable[ChatCompletionMessageParam]: A collection of messages to be processed, including system and user messages.
+            model str: The model to use for generating the chat completion.
+            frequency_penalty Optional[float] | NotGiven: (Optional) A penalty applied to frequency of words.
+            logit_bias Optional[Dict[str, int]] | NotGiven: (Optional) A bias applied to specific tokens.
+            logprobs Optional[bool] | NotGiven: (Optional) Whether to include log probabilities of the tokens.
+            max_tokens Optional[int] | NotGiven: (Optional) The maximum number of tokens to generate in the completion.
+            n Optional[int] | NotGiven: (Optional) The number of completions to generate for each prompt.
+            presence_penalty Optional[float] | NotGiven: (Optional) A penalty applied to presence of words in the chat.
+            response_format completion_create_params.ResponseFormat | NotGiven: (Optional) The format in which to return the response.
+            stop Union[Optional[str], List[str]] | NotGiven: (Optional) A stop sequence or sequences where the response generation will halt.
+            temperature Optional[float] | NotGiven: (Optional) A sampling temperature to control randomness in the output.
+            top_logprobs Optional[int] | NotGiven: (Optional) The number of log probabilities to include for the most likely tokens.
+            top_p Optional[float] | NotGiven: (Optional) A value to control diversity through nucleus sampling.
+        
+        Returns:
+            Iterator[ChatCompletionChunk]: The chunks of the response, the last one carrying the finish reason and usage.
+        """
         if response_format is not NOT_GIVEN and response_format.get("type") == "json_schema":
-            input_kwargs["tool_choice"] = dict(type="tool", name="response_format")
-            input_kwargs["tools"] = [
-                dict(
-                    name="response_format",
-                    description="The response format to use",
-                    input_schema=response_format["json_schema"]["schema"],
+            # the structured response is a tool call, which is only usable once complete
+            completion = self.chat_completion(
+                messages,
+                model,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                stop=stop,
+                temperature=temperature,
+                top_p=top_p,
+            )
+            yield ChatCompletionChunk(
+                id=completion.id,
+                choices=[
+                    ChunkChoice(
+                        index=choice.index,
+                        delta=ChoiceDelta(role="assistant", content=choice.message.content),
+                        finish_reason=choice.finish_reason,
+                    )
+                    for choice in completion.choices
+                ],
+                created=completion.created,
+                model=model,
+                object="chat.completion.chunk",
+                usage=completion.usage,
+            )
+            return
+
+        payload = self.__create_message_kwargs(messages, model, max_tokens, response_format, stop, temperature, top_p)
+        created = int(time.time())
+        with self.client.messages.stream(**payload) as stream:
+            for text in stream.text_stream:
+                yield ChatCompletionChunk(
+                    id=stream.current_message_snapshot.id,
+                    choices=[ChunkChoice(index=0, delta=ChoiceDelta(role="assistant", content=text))],
+                    created=created,
+                    model=model,
+                    object="chat.completion.chunk",
                 )
-            ]
+            message = stream.get_final_message()
 
-        response = self.client.messages.create(**NotGiven.remove_not_given(input_kwargs))
-        return _anthropic_to_openai_response(model, response)
+        yield ChatCompletionChunk(
+            id=message.id,
+            choices=[
+                ChunkChoice(
+                    index=0,
+                    delta=ChoiceDelta(),
+                    finish_reason=_STOP_REASON_MAP.get(message.stop_reason, "stop"),
+                )
+            ],
+            created=created,
+            model=model,
+            object="chat.completion.chunk",
+            usage=CompletionUsage(
+                completion_tokens=message.usage.output_tokens,
+                prompt_tokens=message.usage.input_tokens,
+                total_tokens=message.usage.output_tokens + message.usage.input_tokens,
+            ),
+        )
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import copy
 import functools
+import json
 import time
 
 from google import generativeai
+from google.ai import generativelanguage as glm
 from google.generativeai.types.content_types import (
     add_object_type,
     convert_to_nullable,
@@ -22,7 +25,7 @@ from openai.types.chat.chat_completion import ChatCompletion, Choice
 from typing_extensions import Any, Dict, Iterable, List, Optional, Union
 
 from patchwork.common.client.llm.protocol import NOT_GIVEN, LlmClient, NotGiven
-from patchwork.common.client.llm.utils import json_schema_to_model
+from patchwork.common.client.llm.utils import ResponseCache, json_schema_to_model
 
 
 @functools.lru_cache
@@ -35,15 +38,128 @@ def _cached_list_model_from_google() -> list[Model]:
     return list(generativeai.list_models())
 
 
-class GoogleLlmClient(LlmClient):
-    __SAFETY_SETTINGS = [
-        dict(category="HARM_CATEGORY_HATE_SPEECH", threshold="BLOCK_NONE"),
-        dict(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="BLOCK_NONE"),
-        dict(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="BLOCK_NONE"),
-        dict(category="HARM_CATEGORY_HARASSMENT", threshold="BLOCK_NONE"),
-    ]
-    __MODEL_PREFIX = "models/"
+@functools.lru_cache
+def _cached_model_limits() -> dict[str, int]:
+    """Maps the name of each Google model, without the "models/" prefix, to its input token limit.
+
+    Returns:
+        dict[str, int]: The input token limit of each model by model name.
+    """
+    return {model.name.removeprefix("models/"): model.input_token_limit for model in _cached_list_model_from_google()}
+
+
+@functools.lru_cache
+def _cached_model_names() -> frozenset[str]:
+    """Collects the names of the Google models, without the "models/" prefix.
+
+    Returns:
+        frozenset[str]: The names of the available models.
+    """
+    return frozenset(_cached_model_limits())
+
+
+# google reasons by index = [FINISH_REASON_UNSPECIFIED, STOP, MAX_TOKENS, SAFETY, RECITATION, OTHER]
+# openai allowed reasons: 'stop', 'length', 'tool_calls', 'content_filter', 'function_call'
+_FINISH_REASON_MAP = {
+    2: "length",
+    3: "content_filter",
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_google_schema(json_schema: str) -> dict[str, Any]:
+    """Converts a JSON schema into a Google schema, reusing the result for schemas converted before.
+
+    Args:
+        json_schema str: The JSON schema serialized as JSON with sorted keys.
+
+    Returns:
+        dict[str, Any]: The Google schema representation of the JSON schema.
+    """
+    model = json_schema_to_model(json.loads(json_schema))
+    parameters = model.model_json_schema()
+    defs = parameters.pop("$defs", {})
+
+    for name, value in defs.items():
+        unpack_defs(value, defs)
+    unpack_defs(parameters, defs)
+    convert_to_nullable(parameters)
+    add_object_type(parameters)
+    strip_titles(parameters)
+    return parameters
+
+
+_SAFETY_SETTINGS = (
+    ("HARM_CATEGORY_HATE_SPEECH", "BLOCK_NONE"),
+    ("HARM_CATEGORY_SEXUALLY_EXPLICIT", "BLOCK_NONE"),
+    ("HARM_CATEGORY_DANGEROUS_CONTENT", "BLOCK_NONE"),
+    ("HARM_CATEGORY_HARASSMENT", "BLOCK_NONE"),
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_generative_client(api_key: str) -> glm.GenerativeServiceClient:
+    """Creates a generative service client for an API key, reusing the client created for the same key.
+
+    Args:
+        api_key str: The API key used for authentication with the generative AI service.
 
+    Returns:
+        glm.GenerativeServiceClient: The client sending requests with the API key.
+    """
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_generative_async_client(api_key: str) -> glm.GenerativeServiceAsyncClient:
+    """Creates an async generative service client for an API key, reusing the client created for the same key.
+
+    Args:
+        api_key str: The API key used for authentication with the generative AI service.
+
+    Returns:
+        glm.GenerativeServiceAsyncClient: The async client sending requests with the API key.
+    """
+    return glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_generative_model(
+    api_key: str,
+    model: str,
+    system_instruction: str | None,
+    safety_settings: tuple[tuple[str, str], ...] | None = None,
+    generation_config: str | None = None,
+) -> generativeai.GenerativeModel:
+    """Creates a GenerativeModel for an API key, reusing the instance created for the same arguments.
+
+    Args:
+        api_key str: The API key used for authentication with the generative AI service.
+        model str: The name of the model.
+        system_instruction str | None: The system instruction of the model.
+        safety_settings tuple[tuple[str, str], ...] | None: The (category, threshold) pairs of the safety settings.
+        generation_config str | None: The generation config serialized as JSON with sorted keys.
+
+    Returns:
+        generativeai.GenerativeModel: The model instance for the given arguments.
+    """
+    generative_model = generativeai.GenerativeModel(
+        model_name=model,
+        safety_settings=(
+            None
+            if safety_settings is None
+            else [dict(category=category, threshold=threshold) for category, threshold in safety_settings]
+        ),
+        generation_config=None if generation_config is None else json.loads(generation_config),
+        system_instruction=system_instruction,
+    )
+    # a model otherwise takes the client of the last configured API key when first used,
+    # binding the client of its own key keeps models of different keys apart
+    generative_model._client = _cached_generative_client(api_key)
+    return generative_model
+
+
+class GoogleLlmClient(LlmClient):
     def __init__(self, api_key: str):
         """Initializes the class with the provided API key and configures the generative AI with it.
         
@@ -55,6 +171,7 @@ class GoogleLlmClient(LlmClient):
         """
         self.__api_key = api_key
         generativeai.configure(api_key=api_key)
+        self.__response_cache = ResponseCache()
 
     def __get_model_limits(self, model: str) -> int:
         """Retrieves the input token limit for a specified model.
@@ -65,10 +182,7 @@ class GoogleLlmClient(LlmClient):
         Returns:
             int: The input token limit for the specified model, or a default limit of 1,000,000 if the model is not found.
         """
-        for model_info in _cached_list_model_from_google():
-            if model_info.name == f"{self.__MODEL_PREFIX}{model}":
-                return model_info.input_token_limit
-        return 1_000_000
+        return _cached_model_limits().get(model, 1_000_000)
 
     def get_models(self) -> set[str]:
         """Retrieves a set of model names by removing the model prefix from the cached list of models.
@@ -79,7 +193,7 @@ class GoogleLlmClient(LlmClient):
         Returns:
             set[str]: A set containing the model names without the model prefix.
         """
-        return {model.name.removeprefix(self.__MODEL_PREFIX) for model in _cached_list_model_from_google()}
+        return _cached_model_names()
 
     def is_model_supported(self, model: str) -> bool:
         """Check if a specified model is supported by the system.
@@ -90,7 +204,7 @@ class GoogleLlmClient(LlmClient):
         Returns:
             bool: True if the model is supported, False otherwise.
         """
-        return model in self.get_models()
+        return model in _cached_model_limits()
 
     def is_prompt_supported(self, messages: Iterable[ChatCompletionMessageParam], model: str) -> int:
         """Checks if the provided chat prompt is supported by the specified model by calculating the token count and comparing it to the model's limitations.
@@ -103,7 +217,7 @@ class GoogleLlmClient(LlmClient):
             int: The difference between the model's token limit and the current token count, or -1 if an error occurs during token counting.
         """
         system, chat = self.__openai_messages_to_google_messages(messages)
-        gen_model = generativeai.GenerativeModel(model_name=model, system_instruction=system)
+        gen_model = _cached_generative_model(self.__api_key, model, system)
         try:
             token_count = gen_model.count_tokens(chat).total_tokens
         except Exception as e:
@@ -138,17 +252,60 @@ class GoogleLlmClient(LlmClient):
             tuple[str, list[dict[str, Any]]]: A tuple where the first element is the system message content as a string (or None if not present), 
             and the second element is a list of dictionaries representing the user and assistant messages along with their content parts.
         """
-        system_content = None
-        contents = []
-        for message in messages:
-            if message.get("role") == "system":
-                system_content = message.get("content")
-                continue
-            role = "model" if message.get("role") == "assistant" else "user"
-            parts = [dict(text=message.get("content"))]
-            contents.append(dict(role=role, parts=parts))
-
-        return system_content, contents
+        messages = list(messages)
+        # the last system message wins, as google only accepts a single system instruction
+        system_contents = [message.get("content") for message in messages if message.get("role") == "system"]
+        contents = [
+            dict(role="model" if role == "assistant" else "user", parts=[dict(text=message.get("content"))])
+            for message in messages
+            if (role := message.get("role")) != "system"
+        ]
+
+        return system_contents[-1] if system_contents else None, contents
+
+    def __create_generation_request(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        max_tokens: Optional[int] | NotGiven,
+        response_format: completion_create_params.ResponseFormat | NotGiven,
+        stop: Union[Optional[str], List[str]] | NotGiven,
+        temperature: Optional[float] | NotGiven,
+        top_p: Optional[float] | NotGiven,
+    ) -> tuple[str | None, list[dict[str, Any]], dict[str, Any]]:
+        """Converts OpenAI style chat completion parameters into the arguments of a Google content generation.
+
+        Args:
+            messages Iterable[ChatCompletionMessageParam]: The input messages for the chat completion.
+            max_tokens Optional[int] | NotGiven: Optional maximum number of tokens to generate in the response.
+            response_format completion_create_params.ResponseFormat | NotGiven: Optional format for the response.
+            stop Union[Optional[str], List[str]] | NotGiven: Optional stopping sequences for generation.
+            temperature Optional[float] | NotGiven: Optional value controlling randomness of outputs.
+            top_p Optional[float] | NotGiven: Optional cumulative probability threshold for sampling.
+
+        Returns:
+            tuple[str | None, list[dict[str, Any]], dict[str, Any]]: The system instruction, the contents and the generation config.
+        """
+        generation_dict = dict(
+            stop_sequences=[stop] if isinstance(stop, str) else stop,
+            max_output_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+        )
+
+        is_response_format_given = response_format is not NotGiven and isinstance(response_format, dict)
+        is_json_object = is_response_format_given and response_format.get("type") == "json_object"
+        is_json_schema = is_response_format_given and response_format.get("type") == "json_schema"
+        if is_json_object or is_json_schema:
+            generation_dict["response_mime_type"] = "application/json"
+        if is_json_schema:
+            generation_dict["response_schema"] = self.json_schema_to_google_schema(
+                response_format.get("json_schema", {}).get("schema")
+            )
+
+        system_content, contents = self.__openai_messages_to_google_messages(messages)
+        generation_config = NOT_GIVEN.remove_not_given(generation_dict)
+
+        return system_content, contents, generation_config
 
     def chat_completion(
         self,
@@ -186,33 +343,100 @@ class GoogleLlmClient(LlmClient):
         Returns:
             ChatCompletion: The generated chat completion response object.
         """
-        generation_dict = dict(
-            stop_sequences=[stop] if isinstance(stop, str) else stop,
-            max_output_tokens=max_tokens,
-            temperature=temperature,
-            top_p=top_p,
+        system_content, contents, generation_config = self.__create_generation_request(
+            messages, max_tokens, response_format, stop, temperature, top_p
         )
 
-        is_response_format_given = response_format is not NotGiven and isinstance(response_format, dict)
-        is_json_object = is_response_format_given and response_format.get("type") == "json_object"
-        is_json_schema = is_response_format_given and response_format.get("type") == "json_schema"
-        if is_json_object or is_json_schema:
-            generation_dict["response_mime_type"] = "application/json"
-        if is_json_schema:
-            generation_dict["response_schema"] = self.json_schema_to_google_schema(
-                response_format.get("json_schema", {}).get("schema")
+        # only deterministic requests are cached, sampled responses are expected to differ between calls
+        cache_key = None
+        if temperature == 0:
+            cache_key = ResponseCache.key(
+                dict(
+                    model=model,
+                    generation_config=generation_config,
+                    system_instruction=system_content,
+                    contents=contents,
+                )
             )
+            cached_response = self.__response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
 
-        system_content, contents = self.__openai_messages_to_google_messages(messages)
-
-        model_client = generativeai.GenerativeModel(
-            model_name=model,
-            safety_settings=self.__SAFETY_SETTINGS,
-            generation_config=NOT_GIVEN.remove_not_given(generation_dict),
-            system_instruction=system_content,
+        model_client = _cached_generative_model(
+            self.__api_key, model, system_content, _SAFETY_SETTINGS, json.dumps(generation_config, sort_keys=True)
         )
         response = model_client.generate_content(contents=contents)
-        return self.__google_response_to_openai_response(response, model)
+        completion = self.__google_response_to_openai_response(response, model)
+        if cache_key is not None:
+            self.__response_cache.put(cache_key, completion)
+        return completion
+
+    async def achat_completion(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        frequency_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        logit_bias: Optional[Dict[str, int]] | NotGiven = NOT_GIVEN,
+        logprobs: Optional[bool] | NotGiven = NOT_GIVEN,
+        max_tokens: Optional[int] | NotGiven = NOT_GIVEN,
+        n: Optional[int] | NotGiven = NOT_GIVEN,
+        presence_penalty: Optional[float] | NotGiven = NOT_GIVEN,
+        response_format: completion_create_params.ResponseFormat | NotGiven = NOT_GIVEN,
+        stop: Union[Optional[str], List[str]] | NotGiven = NOT_GIVEN,
+        temperature: Optional[float] | NotGiven = NOT_GIVEN,
+        top_logprobs: Optional[int] | NotGiven = NOT_GIVEN,
+        top_p: Optional[float] | NotGiven = NOT_GIVEN,
+    ) -> ChatCompletion:
+        """Asynchronously generates chat completions, allowing several requests to run concurrently.
+        
+        Args:
+            messages Iterable[ChatCompletionMessageParam]: The input messages for the chat completion.
+            model str: The model identifier to use for generating the completion.
+            frequency_penalty Optional[float] | NotGiven: Optional penalty to apply based on frequency of tokens.
+            logit_bias Optional[Dict[str, int]] | NotGiven: Optional bias to apply to specific tokens in generation.
+            logprobs Optional[bool] | NotGiven: Optional flag indicating if log probabilities should be returned.
+            max_tokens Optional[int] | NotGiven: Optional maximum number of tokens to generate in the response.
+            n Optional[int] | NotGiven: Optional number of completions to generate for the prompt.
+            presence_penalty Optional[float] | NotGiven: Optional penalty to apply based on presence of tokens.
+            response_format completion_create_params.ResponseFormat | NotGiven: Optional format for the response.
+            stop Union[Optional[str], List[str]] | NotGiven: Optional stopping sequences for generation.
+            temperature Optional[float] | NotGiven: Optional value controlling randomness of outputs.
+            top_logprobs Optional[int] | NotGiven: Optional value for number of top log probabilities to return.
+            top_p Optional[float] | NotGiven: Optional cumulative probability threshold for sampling.
+        
+        Returns:
+            ChatCompletion: The generated chat completion response object.
+        """
+        system_content, contents, generation_config = self.__create_generation_request(
+            messages, max_tokens, response_format, stop, temperature, top_p
+        )
+
+        # only deterministic requests are cached, sampled responses are expected to differ between calls
+        cache_key = None
+        if temperature == 0:
+            cache_key = ResponseCache.key(
+                dict(
+                    model=model,
+                    generation_config=generation_config,
+                    system_instruction=system_content,
+                    contents=contents,
+                )
+            )
+            cached_response = self.__response_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        model_client = _cached_generative_model(
+            self.__api_key, model, system_content, _SAFETY_SETTINGS, json.dumps(generation_config, sort_keys=True)
+        )
+        if model_client._async_client is None:
+            # the async client is created on first use, within the running event loop
+            model_client._async_client = _cached_generative_async_client(self.__api_key)
+        response = await model_client.generate_content_async(contents=contents)
+        completion = self.__google_response_to_openai_response(response, model)
+        if cache_key is not None:
+            self.__response_cache.put(cache_key, completion)
+        return completion
 
     @staticmethod
     def __google_response_to_openai_response(google_response: GenerateContentResponse, model: str) -> ChatCompletion:
@@ -225,27 +449,19 @@ class GoogleLlmClient(LlmClient):
         Returns:
             ChatCompletion: An OpenAI response object formatted from the Google response.
         """
-        choices = []
-        for candidate in google_response.candidates:
-            # note that instead of system, from openai, its model, from google.
-            parts = [part.text or part.inline_data for part in candidate.content.parts]
-
-            # google reasons by index = [FINISH_REASON_UNSPECIFIED, STOP, MAX_TOKENS, SAFETY, RECITATION, OTHER]
-            # openai allowed reasons: 'stop', 'length', 'tool_calls', 'content_filter', 'function_call'
-            finish_reason_map = {
-                2: "length",
-                3: "content_filter",
-            }
-
-            choice = Choice(
-                finish_reason=finish_reason_map.get(candidate.finish_reason, "stop"),
+        # note that instead of system, from openai, its model, from google.
+        # only text parts are joined, inline data parts are binary blobs and cannot be part of the content
+        choices = [
+            Choice(
+                finish_reason=_FINISH_REASON_MAP.get(candidate.finish_reason, "stop"),
                 index=candidate.index,
                 message=ChatCompletionMessage(
-                    content="\n".join(parts),
+                    content="\n".join(part.text for part in candidate.content.parts if part.text),
                     role="assistant",
                 ),
             )
-            choices.append(choice)
+            for candidate in google_response.candidates
+        ]
 
         completion_usage = CompletionUsage(
             completion_tokens=google_response.usage_metadata.candidates_token_count,
@@ -277,14 +493,5 @@ class GoogleLlmClient(LlmClient):
         if json_schema is None:
             return None
 
-        model = json_schema_to_model(json_schema)
-        parameters = model.model_json_schema()
-        defs = parameters.pop("$defs", {})
-
-        for name, value in defs.items():
-            unpack_defs(value, defs)
-        unpack_defs(parameters, defs)
-        convert_to_nullable(parameters)
-        add_object_type(parameters)
-        strip_titles(parameters)
-        return parameters
+        # the conversion is cached, return a copy so callers cannot alter the cached schema
+        return copy.deepcopy(_cached_google_schema(json.dumps(json_schema, sort_keys=True)))
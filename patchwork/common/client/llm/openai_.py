@@ -71,6 +71,7 @@ class OpenAiLlmClient(LlmClient):
         
         Returns:
             bool: True if the base URL is valid and not equal to the OpenAI API endpoint, False otherwise.
+        """
         return self.base_url is not None and self.base_url != "https://api.openai.com/v1"
 
     def get_models(self) -> set[str]:
@@ -140,6 +141,20 @@ class OpenAiLlmClient(LlmClient):
 
         return model_limit - token_count
 
+    def _get_encoding(self, model: str) -> tiktoken.Encoding | None:
+        """Retrieves the tokenizer used to count the prompt tokens of the model.
+        
+        Args:
+            model str: The name of the model whose tokenizer is requested.
+        
+        Returns:
+            tiktoken.Encoding | None: The encoding of the model, or None if the model is not served by OpenAI.
+        """
+        if self.__is_not_openai_url():
+            return None
+
+        return tiktoken.encoding_for_model(model)
+
     def truncate_messages(
         self, messages: Iterable[ChatCompletionMessageParam], model: str
     ) -> Iterable[ChatCompletionMessageParam]:
@@ -190,9 +205,7 @@ class OpenAiLlmClient(LlmClient):
         Returns:
             ChatCompletion: The generated chat completion response.
         """
-        input_kwargs = dict(
-            messages=messages,
-            model=model,
+        optional_kwargs = dict(
             frequency_penalty=frequency_penalty,
             logit_bias=logit_bias,
             logprobs=logprobs,
@@ -205,5 +218,7 @@ class OpenAiLlmClient(LlmClient):
             top_logprobs=top_logprobs,
             top_p=top_p,
         )
+        # only the parameters are filtered, the messages are passed on without being scanned for NOT_GIVEN
+        given_kwargs = {key: value for key, value in optional_kwargs.items() if value is not NOT_GIVEN}
 
-        return self.client.chat.completions.create(**NotGiven.remove_not_given(input_kwargs))
+        return self.client.chat.completions.create(messages=messages, model=model, **given_kwargs)
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
-from openai.types.chat import (
-    ChatCompletion,
-    ChatCompletionMessageParam,
-    completion_create_params,
+import functools
+
+import tiktoken
+from typing_extensions import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Union,
 )
-from typing_extensions import Any, Dict, Iterable, List, Optional, Protocol, Union
+
+if TYPE_CHECKING:
+    # only used in annotations, which are not evaluated at runtime
+    from openai.types.chat import (
+        ChatCompletion,
+        ChatCompletionMessageParam,
+        completion_create_params,
+    )
 
 
 class NotGiven:
@@ -21,19 +36,54 @@ class NotGiven:
         Returns:
             Any: A new object with NotGiven instances removed, preserving the original structure.
         """
-        if isinstance(obj, NotGiven):
+        if obj is NOT_GIVEN:
             return None
+        # only containers holding NOT_GIVEN somewhere are rebuilt, anything else is returned as is
+        if not NotGiven.__contains_not_given(obj):
+            return obj
         if isinstance(obj, dict):
             return {k: NotGiven.remove_not_given(v) for k, v in obj.items() if v is not NOT_GIVEN}
+        return [NotGiven.remove_not_given(v) for v in obj if v is not NOT_GIVEN]
+
+    @staticmethod
+    def __contains_not_given(obj: Any) -> bool:
+        """Checks whether NOT_GIVEN occurs in the provided object or in any dictionary or list nested in it.
+        
+        Args:
+            obj Any: The object to be checked.
+        
+        Returns:
+            bool: True if NOT_GIVEN was found, False otherwise.
+        """
+        if obj is NOT_GIVEN:
+            return True
+        if isinstance(obj, dict):
+            return any(NotGiven.__contains_not_given(v) for v in obj.values())
         if isinstance(obj, list):
-            return [NotGiven.remove_not_given(v) for v in obj if v is not NOT_GIVEN]
-        return obj
+            return any(NotGiven.__contains_not_given(v) for v in obj)
+        return False
 
 
 NOT_GIVEN = NotGiven()
 
 
+@functools.lru_cache(maxsize=256)
+def _count_tokens(encoding: tiktoken.Encoding, text: str) -> int:
+    """Counts the tokens of a text, reusing the count of texts seen before.
+    
+    Args:
+        encoding tiktoken.Encoding: The encoding used to tokenize the text.
+        text str: The text to count the tokens of.
+    
+    Returns:
+        int: The number of tokens in the text.
+    """
+    return len(encoding.encode_ordinary(text))
+
+
 class LlmClient(Protocol):
+    __slots__ = ()
+
     def get_models(self) -> set[str]:
         """Retrieve a set of models.
         
@@ -82,6 +132,17 @@ class LlmClient(Protocol):
         """
         ...
 
+    def _get_encoding(self, model: str) -> tiktoken.Encoding | None:
+        """Retrieves the local tokenizer of the model, allowing messages to be truncated in a single pass.
+        
+        Args:
+            model str: The identifier of the model whose tokenizer is requested.
+        
+        Returns:
+            tiktoken.Encoding | None: The encoding used to count the prompt tokens of the model, or None if the tokens can only be counted through `is_prompt_supported`.
+        """
+        return None
+
     @staticmethod
     def _truncate_messages(
         client: "LlmClient", messages: Iterable[ChatCompletionMessageParam], model: str
@@ -98,15 +159,18 @@ class LlmClient(Protocol):
         """
         safety_margin = 500
 
+        encoding = client._get_encoding(model)
+        if encoding is not None:
+            return LlmClient.__truncate_messages_by_tokens(client, encoding, messages, model, safety_margin)
+
         last_message = None
         truncated_messages = []
         for message in messages:
-            future_truncated_messages = truncated_messages.copy()
-            future_truncated_messages.append(message)
-            if client.is_prompt_supported(future_truncated_messages, model) - safety_margin < 0:
+            truncated_messages.append(message)
+            if client.is_prompt_supported(truncated_messages, model) - safety_margin < 0:
+                truncated_messages.pop()
                 last_message = message
                 break
-            truncated_messages.append(message)
 
         if last_message is not None:
 
@@ -119,10 +183,12 @@ class LlmClient(Protocol):
                 Returns:
                     int: The adjusted prompt support value after subtracting a safety margin from the model's calculated limit.
                 """
-                current_messages = truncated_messages.copy()
-                current_messages.append({"content": message_to_test})
-                # add 500 as a safety margin
-                return client.is_prompt_supported(current_messages, model) - safety_margin
+                truncated_messages.append({"content": message_to_test})
+                try:
+                    # add 500 as a safety margin
+                    return client.is_prompt_supported(truncated_messages, model) - safety_margin
+                finally:
+                    truncated_messages.pop()
 
             last_message["content"] = LlmClient.__truncate_message(
                 message=last_message["content"],
@@ -134,19 +200,65 @@ class LlmClient(Protocol):
 
         return truncated_messages
 
+    @staticmethod
+    def __truncate_messages_by_tokens(
+        client: "LlmClient",
+        encoding: tiktoken.Encoding,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        safety_margin: int,
+    ) -> list[ChatCompletionMessageParam]:
+        """Truncates chat messages by keeping a running total of their token counts.
+        
+        Args:
+            client (LlmClient): The client whose model limit is used.
+            encoding (tiktoken.Encoding): The encoding used to count the tokens of each message.
+            messages (Iterable[ChatCompletionMessageParam]): The chat messages to be truncated.
+            model (str): The identifier of the model for which the messages are truncated.
+            safety_margin (int): The number of tokens to keep free below the model limit.
+        
+        Returns:
+            list[ChatCompletionMessageParam]: The messages that fit, the last one cut to the remaining tokens.
+        """
+        # the limit is the number of tokens still available for an empty prompt
+        remaining_tokens = client.is_prompt_supported([], model) - safety_margin
+        truncated_messages = []
+        for message in messages:
+            content = message.get("content") or ""
+            token_count = _count_tokens(encoding, content)
+            if token_count > remaining_tokens:
+                message["content"] = LlmClient.__first_max_tokens(encoding, content, remaining_tokens)
+                truncated_messages.append(message)
+                break
+
+            remaining_tokens -= token_count
+            truncated_messages.append(message)
+
+        return truncated_messages
+
+    @staticmethod
+    def __first_max_tokens(encoding: tiktoken.Encoding, text: str, max_tokens: int) -> str:
+        """Cuts the text down to its first tokens.
+        
+        Args:
+            encoding tiktoken.Encoding: The encoding used to tokenize the text.
+            text str: The text to be truncated.
+            max_tokens int: The maximum number of tokens to keep.
+        
+        Returns:
+            str: The longest prefix of the text consisting of at most `max_tokens` tokens.
+        """
+        tokens = encoding.encode_ordinary(text)
+        if len(tokens) <= max_tokens:
+            return text
+
+        # a token may end in the middle of a multibyte character, drop the incomplete character
+        kept_bytes = b"".join(encoding.decode_tokens_bytes(tokens[: max(max_tokens, 0)]))
+        return kept_bytes.decode("utf-8", errors="ignore")
+
     @staticmethod
     def __truncate_message(message, direction_callback, min_guess, max_guess):
-        # TODO: Add tests for truncate_message
-        # if __name__ == "__main__":
-        # import random
-        # import string
-        # for i in range(1, 1000):
-        #     text = "".join(random.choices(string.ascii_lowercase, k=random.choice(range(i, i + 20))))
-        #     print(f"Truncating {text} to {text[:i]}")
-        #     new = truncate_message(text, lambda x: i - len(x))
-        #     assert text[:i] == new
-        #     print(f"Truncated {text} to {new}")
-        """Recursively truncates a message based on a directional feedback callback, adjusting the truncation limits.
+        """Truncates a message by bisecting its length based on a directional feedback callback.
         
         Args:
             message (str): The message string to be truncated.
@@ -155,20 +267,21 @@ class LlmClient(Protocol):
             max_guess (int): The maximum index to end truncation at.
         
         Returns:
-            str: The truncated message based on the feedback provided by the direction_callback.
+            str: The truncated message based on the feedback provided by the direction_callback, the longest prefix
+                 found to fit if the callback never reports an exact fit.
         """
-        change = int((max_guess - min_guess) / 2)
-        guess = min_guess + change
-        vector = direction_callback(message[:guess])
-        if vector == 0:
-            return message[:guess]
-
-        if vector > 0:
-            min_guess = guess
-        else:
-            max_guess = guess
-
-        return LlmClient.__truncate_message(message, direction_callback, min_guess, max_guess)
+        while max_guess - min_guess > 1:
+            guess = (min_guess + max_guess) // 2
+            vector = direction_callback(message[:guess])
+            if vector == 0:
+                return message[:guess]
+
+            if vector > 0:
+                min_guess = guess
+            else:
+                max_guess = guess
+
+        return message[:min_guess]
 
     def chat_completion(
         self,
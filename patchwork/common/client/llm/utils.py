@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import copy
+import functools
+import hashlib
 import json
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Type
 
 from openai.lib._parsing._completions import type_to_response_format_param
+from openai.types.chat import ChatCompletion
 from openai.types.chat.completion_create_params import ResponseFormat
 from pydantic import BaseModel, Field, create_model
 from typing_extensions import List
@@ -21,6 +26,21 @@ def json_schema_to_model(json_schema: Dict[str, Any]) -> Type[BaseModel]:
     Returns:
         Type[BaseModel]: A Pydantic model class generated based on the provided JSON schema.
     """
+    # keys are not sorted, the order of the properties is the order of the model fields
+    return _cached_json_schema_to_model(json.dumps(json_schema))
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_json_schema_to_model(json_schema: str) -> Type[BaseModel]:
+    """Converts a JSON schema into a Pydantic model class, reusing the class created for the same schema.
+
+    Args:
+        json_schema str: The JSON schema serialized as JSON.
+
+    Returns:
+        Type[BaseModel]: A Pydantic model class generated based on the provided JSON schema.
+    """
+    json_schema = json.loads(json_schema)
     model_name = json_schema.get("title")
 
     field_definitions = dict()
@@ -33,6 +53,15 @@ def json_schema_to_model(json_schema: Dict[str, Any]) -> Type[BaseModel]:
     return create_model(model_name, **field_definitions)
 
 
+_PRIMITIVE_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": Optional[Any],  # Use Optional[Any] for nullable fields
+}
+
+
 def __json_schema_to_pydantic_type(json_schema: Dict[str, Any]) -> type:
     """Converts a JSON schema to a corresponding Pydantic type.
     
@@ -44,14 +73,9 @@ def __json_schema_to_pydantic_type(json_schema: Dict[str, Any]) -> type:
     """
     type_ = json_schema.get("type")
 
-    if type_ == "string":
-        return str
-    elif type_ == "integer":
-        return int
-    elif type_ == "number":
-        return float
-    elif type_ == "boolean":
-        return bool
+    primitive_type = _PRIMITIVE_TYPES.get(type_) if isinstance(type_, str) else None
+    if primitive_type is not None:
+        return primitive_type
     elif type_ == "array":
         items_schema = json_schema.get("items")
         if items_schema:
@@ -67,8 +91,6 @@ def __json_schema_to_pydantic_type(json_schema: Dict[str, Any]) -> type:
             return nested_model
         else:
             return Dict
-    elif type_ == "null":
-        return Optional[Any]  # Use Optional[Any] for nullable fields
     else:
         raise ValueError(f"Unsupported JSON schema type: {type_}")
 
@@ -88,12 +110,26 @@ def example_json_to_schema(json_example: str | dict | None) -> ResponseFormat |
     if json_example is None:
         return None
 
-    base_model = None
-    if isinstance(json_example, str):
-        base_model = __example_string_to_base_model(json_example)
-    elif isinstance(json_example, dict):
-        base_model = __example_dict_to_base_model(json_example)
+    if isinstance(json_example, dict):
+        json_example = json.dumps(json_example)
+    if not isinstance(json_example, str):
+        return None
+
+    # the conversion is cached, return a copy so callers cannot alter the cached schema
+    return copy.deepcopy(_cached_example_json_to_schema(json_example))
+
 
+@functools.lru_cache(maxsize=256)
+def _cached_example_json_to_schema(json_example: str) -> ResponseFormat | None:
+    """Converts a JSON example string into a schema, reusing the schema created for the same example.
+
+    Args:
+        json_example str: The JSON example that is to be converted.
+
+    Returns:
+        ResponseFormat | None: The schema generated from the JSON example or None if the example is invalid.
+    """
+    base_model = __example_string_to_base_model(json_example)
     if base_model is None:
         return None
 
@@ -108,6 +144,7 @@ def base_model_to_schema(base_model: Type[BaseModel]) -> ResponseFormat:
     
     Returns:
         ResponseFormat: The response format corresponding to the given BaseModel.
+    """
     return type_to_response_format_param(base_model)
 
 
@@ -134,7 +171,7 @@ def __example_dict_to_base_model(example_data: dict) -> Type[BaseModel]:
     
     This method recursively processes dictionaries and lists within the input data 
     to define the appropriate field types and metadata for a BaseModel, allowing 
-    for dynamic model creation.
+    for dynamic model creation. Identically shaped dictionaries share one model.
     
     Args:
         example_data dict: A dictionary containing the example data from which 
@@ -144,25 +181,125 @@ def __example_dict_to_base_model(example_data: dict) -> Type[BaseModel]:
         Type[BaseModel]: A dynamically created BaseModel class that represents 
                          the structure and types defined in the input dictionary.
     """
-    base_model_field_defs: dict[str, tuple[type | BaseModel, Field]] = dict()
+    return _cached_example_signature_to_base_model(__example_dict_signature(example_data))
+
+
+def __example_dict_signature(example_data: dict) -> tuple:
+    """Describes the structure of an example dictionary as a hashable signature.
+
+    Args:
+        example_data dict: A dictionary containing the example data.
+
+    Returns:
+        tuple: The keys of the dictionary in order, each paired with the type of its value. Nested dictionaries
+               are described by their own signature and string values are kept as they become field descriptions.
+    """
+    signature = []
     for example_data_key, example_data_value in example_data.items():
         if isinstance(example_data_value, dict):
-            value_typing = __example_dict_to_base_model(example_data_value)
+            value_signature = (dict, __example_dict_signature(example_data_value))
         elif isinstance(example_data_value, list):
             nested_value = example_data_value[0]
             if isinstance(nested_value, dict):
-                nested_typing = __example_dict_to_base_model(nested_value)
+                value_signature = (list, (dict, __example_dict_signature(nested_value)))
             else:
-                nested_typing = type(nested_value)
+                value_signature = (list, (type(nested_value), None))
+        elif type(example_data_value) == str:
+            value_signature = (str, example_data_value)
+        else:
+            value_signature = (type(example_data_value), None)
+        signature.append((example_data_key, value_signature))
+
+    return tuple(signature)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_example_signature_to_base_model(signature: tuple) -> Type[BaseModel]:
+    """Creates the BaseModel type of an example signature, sharing one model between identically shaped examples.
+
+    Args:
+        signature tuple: The signature of the example dictionary.
+
+    Returns:
+        Type[BaseModel]: A dynamically created BaseModel class that represents
+                         the structure and types defined in the signature.
+    """
+    base_model_field_defs: dict[str, tuple[type | BaseModel, Field]] = dict()
+    for example_data_key, (value_type, value_detail) in signature:
+        if value_type is dict:
+            value_typing = _cached_example_signature_to_base_model(value_detail)
+        elif value_type is list:
+            nested_type, nested_detail = value_detail
+            if nested_type is dict:
+                nested_typing = _cached_example_signature_to_base_model(nested_detail)
+            else:
+                nested_typing = nested_type
             value_typing = List[nested_typing]
         else:
-            value_typing = type(example_data_value)
+            value_typing = value_type
 
         field_kwargs = dict()
         if value_typing == str:
-            field_kwargs["description"] = example_data_value
+            field_kwargs["description"] = value_detail
 
         field = Field(**field_kwargs)
         base_model_field_defs[example_data_key] = (value_typing, field)
 
     return create_model("ResponseFormat", **base_model_field_defs)
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 512):
+        """Initializes a bounded, least-recently-used cache of chat completion responses.
+
+        Args:
+            maxsize int: The maximum number of responses kept before the least recently used one is evicted.
+
+        Returns:
+            None
+        """
+        self.__maxsize = maxsize
+        self.__responses: OrderedDict[bytes, ChatCompletion] = OrderedDict()
+
+    @staticmethod
+    def key(payload: dict[str, Any]) -> bytes:
+        """Computes the cache key of a request payload.
+
+        Args:
+            payload dict[str, Any]: The request arguments sent to the vendor API.
+
+        Returns:
+            bytes: A digest of the canonical JSON representation of the payload.
+        """
+        serialized = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> ChatCompletion | None:
+        """Retrieves a copy of the cached response for the given key.
+
+        Args:
+            key bytes: The cache key computed by `ResponseCache.key`.
+
+        Returns:
+            ChatCompletion | None: A copy of the cached response, or None if the key is not cached.
+        """
+        response = self.__responses.get(key)
+        if response is None:
+            return None
+        self.__responses.move_to_end(key)
+        return response.model_copy(deep=True)
+
+    def put(self, key: bytes, response: ChatCompletion) -> None:
+        """Stores a response, evicting the least recently used one when the cache is full.
+
+        Args:
+            key bytes: The cache key computed by `ResponseCache.key`.
+            response ChatCompletion: The response to cache.
+
+        Returns:
+            None
+        """
+        self.__responses[key] = response.model_copy(deep=True)
+        self.__responses.move_to_end(key)
+        if len(self.__responses) > self.__maxsize:
+            self.__responses.popitem(last=False)
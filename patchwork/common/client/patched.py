@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-import asyncio
 import atexit
 import contextlib
+import functools
 import platform
 import socket
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from importlib import metadata
 from pathlib import Path
-from threading import Thread
 from typing import Any
 
 import click
@@ -17,12 +17,26 @@ from git.repo.base import Repo
 from requests import Response, Session
 from requests.adapters import DEFAULT_POOLBLOCK, HTTPAdapter
 from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+from urllib3.util import Retry
 
 from patchwork.common.utils.user_config import get_user_config
 from patchwork.common.utils.utils import get_current_branch, is_container
 from patchwork.logger import logger
 
 
+@functools.lru_cache(maxsize=None)
+def _telemetry_environment() -> dict[str, Any]:
+    # the environment does not change within a process, it is only looked up for the first telemetry event
+    return dict(
+        system=platform.system(),
+        release=platform.release(),
+        machine=platform.machine(),
+        python_version=platform.python_version(),
+        cli_version=metadata.version("patchwork-cli"),
+        is_container=is_container(),
+    )
+
+
 class TCPKeepAliveHTTPSConnectionPool(HTTPSConnectionPool):
     # probe start
     TCP_KEEP_IDLE = 60
@@ -31,6 +45,23 @@ class TCPKeepAliveHTTPSConnectionPool(HTTPSConnectionPool):
     # probe times
     TCP_KEEP_CNT = 3
 
+    # the platform and its socket options do not change, resolve them once instead of per connection
+    _KEEPALIVE_SOCKOPTS = []
+    _KEEPALIVE_IOCTL = None
+    if sys.platform == "linux":
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            _KEEPALIVE_SOCKOPTS.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEP_IDLE))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            _KEEPALIVE_SOCKOPTS.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL))
+        if hasattr(socket, "TCP_KEEPCNT"):
+            _KEEPALIVE_SOCKOPTS.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, TCP_KEEP_CNT))
+    elif sys.platform == "darwin":
+        _KEEPALIVE_SOCKOPTS.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        _KEEPALIVE_SOCKOPTS.append((socket.IPPROTO_TCP, 0x10, TCP_KEEPALIVE_INTERVAL))
+    elif sys.platform == "win32":
+        _KEEPALIVE_IOCTL = (socket.SIO_KEEPALIVE_VALS, (1, TCP_KEEP_IDLE * 1000, TCP_KEEPALIVE_INTERVAL * 1000))
+    _KEEPALIVE_SOCKOPTS = tuple(_KEEPALIVE_SOCKOPTS)
+
     def _validate_conn(self, conn):
         """Validates and configures the TCP connection settings based on the operating system.
         
@@ -42,20 +73,10 @@ class TCPKeepAliveHTTPSConnectionPool(HTTPSConnectionPool):
         """
         super()._validate_conn(conn)
 
-        if sys.platform == "linux":
-            if hasattr(socket, "TCP_KEEPIDLE"):
-                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.TCP_KEEP_IDLE)
-            if hasattr(socket, "TCP_KEEPINTVL"):
-                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, self.TCP_KEEPALIVE_INTERVAL)
-            if hasattr(socket, "TCP_KEEPCNT"):
-                conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, self.TCP_KEEP_CNT)
-        elif sys.platform == "darwin":
-            conn.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-            conn.sock.setsockopt(socket.IPPROTO_TCP, 0x10, self.TCP_KEEPALIVE_INTERVAL)
-        elif sys.platform == "win32":
-            conn.sock.ioctl(
-                socket.SIO_KEEPALIVE_VALS, (1, self.TCP_KEEP_IDLE * 1000, self.TCP_KEEPALIVE_INTERVAL * 1000)
-            )
+        for level, option, value in self._KEEPALIVE_SOCKOPTS:
+            conn.sock.setsockopt(level, option, value)
+        if self._KEEPALIVE_IOCTL is not None:
+            conn.sock.ioctl(*self._KEEPALIVE_IOCTL)
 
 
 class KeepAlivePoolManager(PoolManager):
@@ -77,6 +98,18 @@ class KeepAlivePoolManager(PoolManager):
         }
 
 
+# retry transient server errors with backoff, the last response is returned instead of raising
+_SERVER_ERROR_RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "POST"}),
+    raise_on_status=False,
+)
+# patchflow runs are recorded by POST requests, a server error after the record is stored would duplicate it on retry
+_RUN_RECORD_RETRY = _SERVER_ERROR_RETRY.new(allowed_methods=frozenset({"GET"}))
+
+
 class KeepAliveHTTPSAdapter(HTTPAdapter):
     def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
         """Initializes a pool manager with specified connection settings.
@@ -102,9 +135,13 @@ class KeepAliveHTTPSAdapter(HTTPAdapter):
 class PatchedClient(click.ParamType):
     TOKEN_URL = "https://app.patched.codes/signin"
     DEFAULT_PATCH_URL = "https://patchwork.patched.codes"
-    ALLOWED_TELEMETRY_KEYS = {
-        "model",
-    }
+    # connect and read timeouts, a hanging telemetry endpoint must not hold up the process
+    TELEMETRY_TIMEOUT = (2, 5)
+    ALLOWED_TELEMETRY_KEYS = frozenset(
+        {
+            "model",
+        }
+    )
 
     def __init__(self, access_token: str, url: str = DEFAULT_PATCH_URL):
         """Initializes an instance of the class with an access token and an optional URL.
@@ -118,9 +155,17 @@ class PatchedClient(click.ParamType):
         """
         self.access_token = access_token
         self.url = url
+        self._auth_headers = {"Authorization": f"Bearer {access_token}"}
+        self._token_test_url = f"{url}/token/test"
+        self._patchwork_url = f"{url}/v1/patchwork/"
+        self._telemetry_url = f"{url}/v1/telemetry/"
         self._session = Session()
+        self._session.headers.update(self._auth_headers)
         atexit.register(self._session.close)
         self._edit_tcp_alive()
+        self._telemetry_session = Session()
+        self._telemetry_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="patched-telemetry")
+        atexit.register(self._stop_public_telemetry)
 
     def _edit_tcp_alive(self):
         # credits to https://www.finbourne.com/blog/the-mysterious-hanging-client-tcp-keep-alives
@@ -136,7 +181,26 @@ class PatchedClient(click.ParamType):
         Returns:
             None
         """
-        self._session.mount("https://", KeepAliveHTTPSAdapter())
+        self._session.mount("https://", KeepAliveHTTPSAdapter(max_retries=_SERVER_ERROR_RETRY))
+        if self._patchwork_url.startswith("https://"):
+            # the longest matching prefix is used, so only the run record requests stop retrying POST
+            self._session.mount(self._patchwork_url, KeepAliveHTTPSAdapter(max_retries=_RUN_RECORD_RETRY))
+
+    def _request(self, method: str, **kwargs) -> Response | None:
+        """Sends a request using the session, logging instead of raising on request failures.
+        
+        Args:
+            method str: The HTTP method of the request.
+            **kwargs: Additional keyword arguments that will be passed to the request.
+        
+        Returns:
+            Response | None: Returns the response of the request if it could be sent, otherwise None.
+        """
+        try:
+            return self._session.request(method, **kwargs)
+        except requests.RequestException as e:
+            logger.error(f"Request to patched server failed with exception: {e}")
+        return None
 
     def _post(self, **kwargs) -> Response | None:
         """Sends a POST request using the session.
@@ -147,16 +211,7 @@ class PatchedClient(click.ParamType):
         Returns:
             Response | None: Returns the response from the POST request if successful, otherwise None.
         """
-        try:
-            response = self._session.post(**kwargs)
-        except requests.ConnectionError as e:
-            logger.error(f"Unable to establish connection to patched server: {e}")
-            return None
-        except requests.RequestException as e:
-            logger.error(f"Request failed with exception: {e}")
-            return None
-
-        return response
+        return self._request("POST", **kwargs)
 
     def _get(self, **kwargs) -> Response | None:
         """Executes a GET request using the session and handles any potential exceptions.
@@ -167,16 +222,7 @@ class PatchedClient(click.ParamType):
         Returns:
             Response | None: The Response object if the request is successful, None if there was a connection error or another request exception.
         """
-        try:
-            response = self._session.get(**kwargs)
-        except requests.ConnectionError as e:
-            logger.error(f"Unable to establish connection to patched server: {e}")
-            return None
-        except requests.RequestException as e:
-            logger.error(f"Request failed with exception: {e}")
-            return None
-
-        return response
+        return self._request("GET", **kwargs)
 
     def test_token(self) -> bool:
         """Tests the validity of the access token by sending a request to the token test endpoint.
@@ -188,9 +234,7 @@ class PatchedClient(click.ParamType):
             bool: True if the access token is valid and the response indicates a successful test, 
                   False otherwise.
         """
-        response = self._post(
-            url=self.url + "/token/test", headers={"Authorization": f"Bearer {self.access_token}"}, json={}
-        )
+        response = self._post(url=self._token_test_url, json={})
 
         if response is None:
             return False
@@ -215,15 +259,12 @@ class PatchedClient(click.ParamType):
         Returns:
             dict: A modified dictionary with additional keys set to True for any keys not in the allowed telemetry keys.
         """
-        diff_keys = set(inputs.keys()).difference(self.ALLOWED_TELEMETRY_KEYS)
+        if not inputs:
+            return {}
 
-        inputs_copy = inputs.copy()
-        for key in diff_keys:
-            inputs_copy[key] = True
+        return {key: value if key in self.ALLOWED_TELEMETRY_KEYS else True for key, value in inputs.items()}
 
-        return inputs_copy
-
-    async def _public_telemetry(self, patchflow: str, inputs: dict[str, Any]):
+    def _public_telemetry(self, patchflow: str, inputs: dict[str, Any]):
         """Sends telemetry data to a remote server.
         
         Args:
@@ -234,26 +275,20 @@ class PatchedClient(click.ParamType):
             None: This method does not return any value.
         """
         user_config = get_user_config()
-        requests.post(
-            url=self.url + "/v1/telemetry/",
-            headers={"Authorization": f"Bearer {self.access_token}"},
+        self._telemetry_session.post(
+            url=self._telemetry_url,
+            headers=self._auth_headers,
             json=dict(
                 client_id=user_config.id,
                 patchflow=patchflow,
                 inputs=self.__handle_telemetry_inputs(inputs),
-                environment=dict(
-                    system=platform.system(),
-                    release=platform.release(),
-                    machine=platform.machine(),
-                    python_version=platform.python_version(),
-                    cli_version=metadata.version("patchwork-cli"),
-                    is_container=is_container(),
-                ),
+                environment=_telemetry_environment(),
             ),
+            timeout=self.TELEMETRY_TIMEOUT,
         )
 
     def send_public_telemetry(self, patchflow: str, inputs: dict):
-        """Starts a new thread to send public telemetry data asynchronously.
+        """Schedules public telemetry data to be sent by the background telemetry worker.
         
         Args:
             patchflow str: A string identifier for the telemetry patch flow.
@@ -263,11 +298,25 @@ class PatchedClient(click.ParamType):
             None: This method does not return any value.
         """
         try:
-            _thread = Thread(target=asyncio.run, args=(self._public_telemetry(patchflow, inputs),))
-            _thread.start()
+            future = self._telemetry_executor.submit(self._public_telemetry, patchflow, inputs)
+            future.add_done_callback(self.__log_public_telemetry_failure)
         except Exception as e:
             logger.debug(f"Failed to send public telemetry: {e}")
 
+    @staticmethod
+    def __log_public_telemetry_failure(future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Failed to send public telemetry: {future.exception()}")
+
+    def _stop_public_telemetry(self):
+        """Waits for the scheduled telemetry to be sent, then stops the background telemetry worker.
+        
+        Returns:
+            None: This method does not return any value.
+        """
+        self._telemetry_executor.shutdown(wait=True)
+        self._telemetry_session.close()
+
     @contextlib.contextmanager
     def patched_telemetry(self, patchflow: str, inputs: dict):
         """Handles the telemetry of a patchflow run, yielding control between operations.
@@ -299,7 +348,13 @@ class PatchedClient(click.ParamType):
 
         try:
             repo = Repo(Path.cwd(), search_parent_directories=True)
-            patchflow_run_id = self.record_patchflow_run(patchflow, repo, self.__handle_telemetry_inputs(inputs))
+            # the remote and branch do not change during the patchflow run, they are read once for both records
+            repo_url = repo.remotes.origin.url
+            head = get_current_branch(repo)
+            branch = head.remote_head if head.is_remote() else head.name
+            patchflow_run_id = self.record_patchflow_run(
+                patchflow, repo_url, branch, self.__handle_telemetry_inputs(inputs)
+            )
         except Exception as e:
             logger.error(f"Failed to record patchflow run: {e}")
             yield
@@ -313,28 +368,25 @@ class PatchedClient(click.ParamType):
             yield
         finally:
             try:
-                self.finish_record_patchflow_run(patchflow_run_id, patchflow, repo)
+                self.finish_record_patchflow_run(patchflow_run_id, patchflow, repo_url)
             except Exception as e:
                 logger.error(f"Failed to finish patchflow run: {e}")
 
-    def record_patchflow_run(self, patchflow: str, repo: Repo, inputs: dict) -> int | None:
+    def record_patchflow_run(self, patchflow: str, repo_url: str, branch: str, inputs: dict) -> int | None:
         """Records a Patchflow run for a given repository and inputs.
         
         Args:
             patchflow str: The identifier for the patchflow being recorded.
-            repo Repo: The repository instance where the patchflow is applied.
+            repo_url str: The remote url of the repository where the patchflow is applied.
+            branch str: The name of the branch the patchflow is applied on.
             inputs dict: A dictionary of inputs required for the patchflow run.
         
         Returns:
             int | None: The ID of the recorded patchflow run if successful, otherwise None.
         """
-        head = get_current_branch(repo)
-        branch = head.remote_head if head.is_remote() else head.name
-
         response = self._post(
-            url=self.url + "/v1/patchwork/",
-            headers={"Authorization": f"Bearer {self.access_token}"},
-            json={"url": repo.remotes.origin.url, "patchflow": patchflow, "branch": branch, "inputs": inputs},
+            url=self._patchwork_url,
+            json={"url": repo_url, "patchflow": patchflow, "branch": branch, "inputs": inputs},
         )
 
         if response is None:
@@ -347,23 +399,22 @@ class PatchedClient(click.ParamType):
         logger.debug(f"Patchflow run recorded for {patchflow}")
         return response.json()["id"]
 
-    def finish_record_patchflow_run(self, id: int, patchflow: str, repo: Repo) -> None:
+    def finish_record_patchflow_run(self, id: int, patchflow: str, repo_url: str) -> None:
         """Finishes a Patchflow run by sending a POST request to the Patchwork API.
         
         Args:
             id int: The identifier of the Patchflow run to be finished.
             patchflow str: The name or identifier of the patchflow being applied.
-            repo Repo: The repository object containing information about the repository, particularly the remote URL.
+            repo_url str: The remote url of the repository where the patchflow was applied.
         
         Returns:
             None: This method does not return a value; it performs a side effect by sending a request and logging the outcome.
         """
         response = self._post(
-            url=self.url + "/v1/patchwork/",
-            headers={"Authorization": f"Bearer {self.access_token}"},
+            url=self._patchwork_url,
             json={
                 "id": id,
-                "url": repo.remotes.origin.url,
+                "url": repo_url,
                 "patchflow": patchflow,
             },
         )
@@ -3,6 +3,7 @@ from __future__ import annotations
 import functools
 import hashlib
 import itertools
+import re
 import time
 from enum import Enum
 from itertools import chain
@@ -10,14 +11,23 @@ from itertools import chain
 import gitlab.const
 from attrs import define
 from github import Auth, Consts, Github, GithubException, PullRequest
+from github.Commit import Commit
+from github.Repository import Repository
 from gitlab import Gitlab, GitlabAuthenticationError, GitlabError
-from gitlab.v4.objects import ProjectMergeRequest
+from gitlab.v4.objects import Project, ProjectMergeRequest
 from giturlparse import GitUrlParsed, parse
 from typing_extensions import Protocol, TypedDict
 
 from patchwork.logger import logger
 
+# placeholders are "{{path:start_line:end_line}}", the content ends at the first "}}"
+_TEMPLATE_PLACEHOLDER = re.compile(r"\{\{(.*?)\}\}", re.DOTALL)
+# diff anchors only identify files in the platforms' diff views, they are not security sensitive
+_sha256 = functools.partial(hashlib.sha256, usedforsecurity=False)
+_sha1 = functools.partial(hashlib.sha1, usedforsecurity=False)
 
+
+@functools.lru_cache(maxsize=512)
 def get_slug_from_remote_url(remote_url: str) -> str:
     """Extracts a slug from a given remote URL of a repository.
     
@@ -33,6 +43,35 @@ def get_slug_from_remote_url(remote_url: str) -> str:
     return slug
 
 
+# steps each create their own client, the clients with the same url and token share one connection
+@functools.lru_cache(maxsize=128)
+def _cached_github(url: str, access_token: str) -> Github:
+    """Creates a Github client authenticated with a token, reusing the client created for the same url and token.
+
+    Args:
+        url str: The base URL of the GitHub API.
+        access_token str: The personal access token to authenticate with.
+
+    Returns:
+        Github: An authenticated Github client.
+    """
+    return Github(base_url=url, auth=Auth.Token(access_token))
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_gitlab(url: str, access_token: str) -> Gitlab:
+    """Creates a Gitlab client authenticated with a token, reusing the client created for the same url and token.
+
+    Args:
+        url str: The base URL of the GitLab instance.
+        access_token str: The private token to authenticate with.
+
+    Returns:
+        Gitlab: An authenticated Gitlab client.
+    """
+    return Gitlab(url, private_token=access_token)
+
+
 @define
 class Comment:
     path: str
@@ -60,26 +99,31 @@ class PullRequestTexts(TypedDict):
 
 
 class PullRequestState(Enum):
-    OPEN = (["open"], ["opened"])
-    CLOSED = (["closed"], ["closed", "merged"])
+    OPEN = ("open", ("opened",))
+    CLOSED = ("closed", ("closed", "merged"))
 
-    def __init__(self, github_state: list[str], gitlab_state: list[str]):
+    def __init__(self, github_state: str, gitlab_state: tuple[str, ...]):
         """Initializes the configuration for GitHub and GitLab states.
         
         Args:
-            github_state list[str]: A list representing the state of GitHub.
-            gitlab_state list[str]: A list representing the state of GitLab.
+            github_state str: The GitHub state matching this state.
+            gitlab_state tuple[str, ...]: The GitLab states matching this state.
             
         Returns:
             None: This method does not return any value.
         """
-        self.github_state: list[str] = github_state
-        self.gitlab_state: list[str] = gitlab_state
+        self.github_state: str = github_state
+        self.gitlab_state: tuple[str, ...] = gitlab_state
 
 
 _COMMENT_MARKER = "<!-- PatchWork comment marker -->"
 
 
+def _is_marked_comment(body: str | None) -> bool:
+    # bodies can be null, startswith already compares the prefix without copying it
+    return body is not None and body.startswith(_COMMENT_MARKER)
+
+
 class PullRequestProtocol(Protocol):
     @property
     def id(self) -> int:
@@ -142,38 +186,18 @@ class PullRequestProtocol(Protocol):
         """ 
         ...
 
-    def texts(self) -> PullRequestTexts:
+    def texts(self, max_files: int | None = None, max_comments: int | None = None) -> PullRequestTexts:
         """Retrieves the texts associated with the pull request.
         
         Args:
-            None
+            max_files int | None: The maximum number of file diffs to retrieve, all of them if None.
+            max_comments int | None: The maximum number of comments to retrieve, all of them if None.
         
         Returns:
             PullRequestTexts: An object containing the texts related to the pull request.
         """
         ...
 
-    @staticmethod
-    def _get_template_indexes(template: str) -> tuple[int | None, int | None]:
-        """Retrieves the starting and ending indexes of template placeholders within a given string.
-        
-        Args:
-            template str: The string containing template placeholders marked by '{{' and '}}'.
-        
-        Returns:
-            tuple[int | None, int | None]: A tuple containing the starting and ending indexes of the placeholders.
-            If no placeholders are found, both values in the tuple will be None.
-        """
-        start_idx = template.find("{{")
-        if start_idx == -1:
-            return None, None
-
-        end_idx = template.find("}}", start_idx)
-        if end_idx == -1:
-            return None, None
-
-        return start_idx, end_idx
-
     @staticmethod
     def _apply_pr_template(pr: "PullRequestProtocol", body: str) -> str:
         """Applies a template to a pull request or merge request body, replacing placeholders with formatted links based on the request type.
@@ -185,47 +209,36 @@ class PullRequestProtocol(Protocol):
         Returns:
             str: The formatted template with placeholders replaced by actual links.
         """
-        if isinstance(pr, GithubPullRequest):
-            backup_link_format = "{url}/files"
-            file_link_format = backup_link_format + "#diff-{diff_anchor}"
-            chunk_link_format = file_link_format + "L{start_line}-L{end_line}"
-            anchor_hash = hashlib.sha256
-        elif isinstance(pr, GitlabMergeRequest):
-            backup_link_format = "{url}/diffs"
-            file_link_format = backup_link_format + "#{diff_anchor}"
-            # TODO: deal with gitlab line links
-            # chunk_link_format = file_link_format + "_{start_line}_{end_line}"
-            chunk_link_format = file_link_format + ""
-            anchor_hash = hashlib.sha1
-        else:
+        link_formats = _PR_LINK_FORMATS.get(type(pr))
+        if link_formats is None:
             return pr.url()
+        backup_link_format, file_link_format, chunk_link_format, anchor_hash = link_formats
 
-        template = body
-        start_idx, end_idx = PullRequestProtocol._get_template_indexes(template)
-        while start_idx is not None and end_idx is not None:
-            template_content = template[start_idx + 2 : end_idx]
+        url = pr.url()
+        # templates often link the same file several times, hash each path once
+        diff_anchors: dict[str, str] = {}
 
-            split_parts = template_content.split(":")
-            split_parts_iter = iter(split_parts)
-            path = next(split_parts_iter, None)
-            start = next(split_parts_iter, None)
-            end = next(split_parts_iter, None)
+        def replace_placeholder(match: re.Match) -> str:
+            # anything after a third colon is ignored, so the rest is left unsplit
+            parts = match.group(1).split(":", 3)
+            path = parts[0]
+            start = parts[1] if len(parts) > 1 else None
+            end = parts[2] if len(parts) > 2 else None
 
             diff_anchor = ""
             format_to_use = backup_link_format
             if path is not None:
-                diff_anchor = anchor_hash(path.encode()).hexdigest()
+                diff_anchor = diff_anchors.get(path)
+                if diff_anchor is None:
+                    diff_anchor = anchor_hash(path.encode()).hexdigest()
+                    diff_anchors[path] = diff_anchor
                 format_to_use = file_link_format
                 if start is not None and end is not None:
                     format_to_use = chunk_link_format
 
-            replacement_value = format_to_use.format(
-                url=pr.url(), diff_anchor=diff_anchor, start_line=start, end_line=end
-            )
-            template = template[:start_idx] + replacement_value + template[end_idx + 2 :]
-            start_idx, end_idx = PullRequestProtocol._get_template_indexes(template)
+            return format_to_use.format(url=url, diff_anchor=diff_anchor, start_line=start, end_line=end)
 
-        return template
+        return _TEMPLATE_PLACEHOLDER.sub(replace_placeholder, body)
 
 
 class ScmPlatformClientProtocol(Protocol):
@@ -435,10 +448,12 @@ class GitlabMergeRequest(PullRequestProtocol):
             note = self._mr.notes.create({"body": final_body})
             return f"#note_{note.get_id()}"
 
+        # the commits and diffs of a new merge request are computed asynchronously, retry while they are empty
         commit = None
         for i in range(3):
             try:
                 commit = self._mr.commits().next()
+                break
             except StopIteration:
                 time.sleep(2**i)
 
@@ -498,14 +513,16 @@ class GitlabMergeRequest(PullRequestProtocol):
         """
         for discussion in self._mr.discussions.list(iterator=True):
             for note in discussion.attributes["notes"]:
-                if note["body"].startswith(_COMMENT_MARKER):
+                if _is_marked_comment(note["body"]):
                     discussion.notes.delete(note["id"])
 
-    def texts(self) -> PullRequestTexts:
+    def texts(self, max_files: int | None = None, max_comments: int | None = None) -> PullRequestTexts:
         """Retrieves the title, body, comments, and diffs of a merge request.
         
         Args:
             self: The instance of the class containing the merge request.
+            max_files int | None: The maximum number of file diffs to retrieve, all of them if None.
+            max_comments int | None: The maximum number of comments to retrieve, all of them if None.
         
         Returns:
             PullRequestTexts: A dictionary containing the title, body, comments, 
@@ -513,24 +530,29 @@ class GitlabMergeRequest(PullRequestProtocol):
         """
         title = self._mr.title
         body = self._mr.description
-        notes = [
-            dict(user=note.author.get("username") or "", body=note.body)
-            for note in self._mr.notes.list(iterator=True)
-            if note.system is False and note.author is not None and note.body is not None
-        ]
-
-        diffs = self._mr.diffs.list()
-        latest_diff = max(diffs, key=lambda diff: diff.created_at, default=None)
+        notes = []
+        # the notes endpoint cannot filter out system notes, larger pages only cut down the round trips
+        for note in self._mr.notes.list(iterator=True, per_page=100):
+            if max_comments is not None and len(notes) >= max_comments:
+                break
+            author = note.author
+            if note.system is False and author is not None and note.body is not None:
+                notes.append({"user": author.get("username") or "", "body": note.body})
+
+        # the diff versions of a merge request are listed newest first, only the first one is fetched
+        diffs = self._mr.diffs.list(per_page=1, get_all=False)
+        latest_diff = next(iter(diffs), None)
         if latest_diff is None:
-            return dict(title=title, body=body, comments=notes, diffs={})
+            return {"title": title, "body": body, "comments": notes, "diffs": {}}
 
         files = self._mr.diffs.get(latest_diff.id).diffs
-        return dict(
-            title=title,
-            body=body,
-            comments=notes,
-            diffs={file["new_path"]: file["diff"] for file in files if not file["diff"].startswith("Binary files")},
-        )
+        text_files = (file for file in files if not file["diff"].startswith("Binary files"))
+        return {
+            "title": title,
+            "body": body,
+            "comments": notes,
+            "diffs": {file["new_path"]: file["diff"] for file in itertools.islice(text_files, max_files)},
+        }
 
 
 class GithubPullRequest(PullRequestProtocol):
@@ -607,7 +629,12 @@ class GithubPullRequest(PullRequestProtocol):
             kwargs["line"] = end_line
             kwargs["side"] = "LEFT"
 
-        return self._pr.create_review_comment(commit=self._pr.get_commits()[0], **kwargs).html_url  # type: ignore
+        return self._pr.create_review_comment(commit=self._first_commit, **kwargs).html_url  # type: ignore
+
+    @functools.cached_property
+    def _first_commit(self) -> Commit:
+        # the first commit of a pull request does not change, it is only looked up for the first review comment
+        return self._pr.get_commits()[0]
 
     def reset_comments(self) -> None:
         """Resets comments associated with a pull request by deleting those that start with a designated marker.
@@ -622,28 +649,47 @@ class GithubPullRequest(PullRequestProtocol):
             None: This method does not return any value.
         """
         for comment in chain(self._pr.get_review_comments(), self._pr.get_issue_comments()):
-            if comment.body.startswith(_COMMENT_MARKER):
+            if _is_marked_comment(comment.body):
                 comment.delete()
 
-    def texts(self) -> PullRequestTexts:
+    def texts(self, max_files: int | None = None, max_comments: int | None = None) -> PullRequestTexts:
         """Retrieves the textual components of a pull request, including its title, body, comments, and diffs.
         
         Args:
             self: The instance of the class containing the pull request data.
+            max_files int | None: The maximum number of file diffs to retrieve, all of them if None.
+            max_comments int | None: The maximum number of comments to retrieve, all of them if None.
         
         Returns:
             PullRequestTexts: A dictionary containing the title, body, comments, and diffs of the pull request.
         """
-        return dict(
-            title=self._pr.title or "",
-            body=self._pr.body or "",
-            comments=[
-                dict(user=comment.user.name, body=comment.body)
-                for comment in itertools.chain(self._pr.get_comments(), self._pr.get_issue_comments())
+        # the listings are paginated, stopping early skips fetching the remaining pages
+        comments = itertools.chain(self._pr.get_comments(), self._pr.get_issue_comments())
+        # None checks for binary files
+        text_files = (file for file in self._pr.get_files() if file.patch is not None)
+        return {
+            "title": self._pr.title or "",
+            "body": self._pr.body or "",
+            "comments": [
+                {"user": comment.user.name, "body": comment.body}
+                for comment in itertools.islice(comments, max_comments)
             ],
-            # None checks for binary files
-            diffs={file.filename: file.patch for file in self._pr.get_files() if file.patch is not None},
-        )
+            "diffs": {file.filename: file.patch for file in itertools.islice(text_files, max_files)},
+        }
+
+
+# backup, file and chunk link formats with the diff anchor hash of each pull request type
+_PR_LINK_FORMATS = {
+    GithubPullRequest: (
+        "{url}/files",
+        "{url}/files#diff-{diff_anchor}",
+        "{url}/files#diff-{diff_anchor}L{start_line}-L{end_line}",
+        _sha256,
+    ),
+    # TODO: deal with gitlab line links
+    # chunk link format: "{url}/diffs#{diff_anchor}_{start_line}_{end_line}"
+    GitlabMergeRequest: ("{url}/diffs", "{url}/diffs#{diff_anchor}", "{url}/diffs#{diff_anchor}", _sha1),
+}
 
 
 class GithubClient(ScmPlatformClientProtocol):
@@ -661,6 +707,7 @@ class GithubClient(ScmPlatformClientProtocol):
         """ 
         self._access_token = access_token
         self._url = url
+        self._repos: dict[str, Repository] = dict()
 
     @functools.cached_property
     def github(self) -> Github:
@@ -672,8 +719,22 @@ class GithubClient(ScmPlatformClientProtocol):
         Returns:
             Github: An authenticated Github client instance for interacting with the GitHub API.
         """
-        auth = Auth.Token(self._access_token)
-        return Github(base_url=self._url, auth=auth)
+        return _cached_github(self._url, self._access_token)
+
+    def _get_repo(self, slug: str) -> Repository:
+        """Retrieves a repository, reusing the repository already retrieved for the same slug.
+        
+        Args:
+            slug str: The repository identifier in the format 'owner/repo'.
+        
+        Returns:
+            Repository: The repository identified by the slug.
+        """
+        repo = self._repos.get(slug)
+        if repo is None:
+            repo = self.github.get_repo(slug)
+            self._repos[slug] = repo
+        return repo
 
     def test(self) -> bool:
         """Test method that always returns True.
@@ -704,7 +765,8 @@ class GithubClient(ScmPlatformClientProtocol):
             tuple[str, int] | None: A tuple containing the extracted slug and resource ID if successful; 
                                     otherwise, None if the URL is invalid or cannot be parsed.
         """
-        url_parts = url.split("/")
+        # only the owner/repo/<type>/<id> tail is needed
+        url_parts = url.rsplit("/", 4)
         if len(url_parts) < 5:
             logger.error(f"Invalid issue URL: {url}")
             return None
@@ -742,7 +804,7 @@ class GithubClient(ScmPlatformClientProtocol):
             IssueText | None: A dictionary containing the issue's title, body, and comments 
                               if the issue is found; otherwise, returns None.
         """
-        repo = self.github.get_repo(slug)
+        repo = self._get_repo(slug)
         try:
             issue = repo.get_issue(issue_id)
             return dict(
@@ -776,7 +838,7 @@ class GithubClient(ScmPlatformClientProtocol):
         Returns:
             PullRequestProtocol | None: An instance of the GithubPullRequest if found, otherwise None.
         """
-        repo = self.github.get_repo(slug)
+        repo = self._get_repo(slug)
         try:
             pr = repo.get_pull(pr_id)
             return GithubPullRequest(pr)
@@ -804,35 +866,38 @@ class GithubClient(ScmPlatformClientProtocol):
         Returns:
             list[GithubPullRequest]: A list of pull request objects that match the specified criteria.
         """
-        repo = self.github.get_repo(slug)
-        kwargs_list = dict(state=[None], target_branch=[None], source_branch=[None])
+        repo = self._get_repo(slug)
+        kwargs = dict()
 
         if state is not None:
-            kwargs_list["state"] = state.github_state  # type: ignore
+            # each state maps to a single GitHub state, the pull requests are listed with one query
+            kwargs["state"] = state.github_state
         if original_branch is not None:
-            kwargs_list["base"] = [original_branch]  # type: ignore
+            kwargs["base"] = original_branch
         if feature_branch is not None:
-            kwargs_list["head"] = [feature_branch]  # type: ignore
-
-        page_list = []
-        keys = kwargs_list.keys()
-        for instance in itertools.product(*kwargs_list.values()):
-            kwargs = dict(((key, value) for key, value in zip(keys, instance) if value is not None))
+            # GitHub only filters on the head branch when it is qualified by its owner
+            owner, _, _ = slug.partition("/")
+            kwargs["head"] = f"{owner}:{feature_branch}"
+
+        per_page = self.github.per_page
+        # list the maximum of 100 PRs per page, the default of 30 takes more round trips
+        self.github.per_page = 100
+        if limit is not None:
+            # both branches are filtered by GitHub so every listed PR matches, pages of the limit are enough
+            self.github.per_page = min(max(limit, 1), 100)
+        try:
             pages = repo.get_pulls(**kwargs)
-            page_list.append(pages)
+        finally:
+            # the page size is read when the listing is created, later pages follow its links
+            self.github.per_page = per_page
 
-        branch_checker = lambda pr: True
-        if original_branch is not None:
-            branch_checker = lambda pr: branch_checker and pr.base.ref == original_branch
-        if feature_branch is not None:
-            branch_checker = lambda pr: branch_checker and pr.head.ref == feature_branch
+        def is_branch_match(pr: PullRequest) -> bool:
+            return (original_branch is None or pr.base.ref == original_branch) and (
+                feature_branch is None or pr.head.ref == feature_branch
+            )
 
-        # filter out PRs that are not the ones we are looking for
-        rv_list = []
-        for pr in itertools.islice(itertools.chain(*page_list), limit):
-            if branch_checker(pr):
-                rv_list.append(GithubPullRequest(pr))
-        return rv_list
+        # filter out PRs that are not the ones we are looking for, the limit applies to the matching PRs
+        return [GithubPullRequest(pr) for pr in itertools.islice(filter(is_branch_match, pages), limit)]
 
     def create_pr(
         self,
@@ -855,7 +920,7 @@ class GithubClient(ScmPlatformClientProtocol):
         Returns:
             PullRequestProtocol: An object representing the created pull request.
         """
-        repo = self.github.get_repo(slug)
+        repo = self._get_repo(slug)
         gh_pr = repo.create_pull(title=title, body=body, base=original_branch, head=feature_branch)
         pr = GithubPullRequest(gh_pr)
         return pr
@@ -874,7 +939,7 @@ class GithubClient(ScmPlatformClientProtocol):
         Returns:
             str: The HTML URL of the created comment or issue.
         """
-        repo = self.github.get_repo(slug)
+        repo = self._get_repo(slug)
         if issue_id is not None:
             return repo.get_issue(issue_id).create_comment(issue_text).html_url
         else:
@@ -896,6 +961,7 @@ class GitlabClient(ScmPlatformClientProtocol):
         """ 
         self._access_token = access_token
         self._url = url
+        self._projects: dict[str, Project] = dict()
 
     @functools.cached_property
     def gitlab(self) -> Gitlab:
@@ -907,7 +973,22 @@ class GitlabClient(ScmPlatformClientProtocol):
         Returns:
             Gitlab: An instance of the Gitlab client configured with the provided URL and access token.
         """
-        return Gitlab(self._url, private_token=self._access_token)
+        return _cached_gitlab(self._url, self._access_token)
+
+    def _get_project(self, slug: str) -> Project:
+        """Retrieves a project, reusing the project already retrieved for the same slug.
+        
+        Args:
+            slug str: The unique identifier of the project (project slug).
+        
+        Returns:
+            Project: The project identified by the slug.
+        """
+        project = self._projects.get(slug)
+        if project is None:
+            project = self.gitlab.projects.get(slug)
+            self._projects[slug] = project
+        return project
 
     def set_url(self, url: str) -> None:
         """Sets the URL for the instance.
@@ -948,7 +1029,8 @@ class GitlabClient(ScmPlatformClientProtocol):
         Returns:
             tuple[str, int] | None: A tuple containing the slug and resource ID if successful, or None if the URL is invalid.
         """
-        url_parts = url.split("/")
+        # only the owner/repo/-/<type>/<id> tail is needed
+        url_parts = url.rsplit("/", 5)
         if len(url_parts) < 5:
             logger.error(f"Invalid issue URL: {url}")
             return None
@@ -986,7 +1068,7 @@ class GitlabClient(ScmPlatformClientProtocol):
             IssueText | None: A dictionary containing the issue's title, body, and comments 
                               if found; otherwise, returns None.
         """
-        project = self.gitlab.projects.get(slug)
+        project = self._get_project(slug)
         try:
             issue = project.issues.get(issue_id)
             return dict(
@@ -1020,7 +1102,7 @@ class GitlabClient(ScmPlatformClientProtocol):
         Returns:
             PullRequestProtocol | None: The merge request object if found, otherwise None.
         """
-        project = self.gitlab.projects.get(slug)
+        project = self._get_project(slug)
         try:
             mr = project.mergerequests.get(pr_id)
             return GitlabMergeRequest(mr)
@@ -1048,7 +1130,7 @@ class GitlabClient(ScmPlatformClientProtocol):
         Returns:
             list[PullRequestProtocol]: A list of PullRequestProtocol instances representing the retrieved merge requests.
         """
-        project = self.gitlab.projects.get(slug)
+        project = self._get_project(slug)
         kwargs_list = dict(iterator=[True], state=[None], target_branch=[None], source_branch=[None])
 
         if state is not None:
@@ -1058,18 +1140,14 @@ class GitlabClient(ScmPlatformClientProtocol):
         if feature_branch is not None:
             kwargs_list["source_branch"] = [feature_branch]  # type: ignore
 
-        page_list = []
-        keys = kwargs_list.keys()
-        for instance in itertools.product(*kwargs_list.values()):
-            kwargs = dict(((key, value) for key, value in zip(keys, instance) if value is not None))
-            mrs_instance = project.mergerequests.list(**kwargs)
-            page_list.append(list(mrs_instance))
-
-        rv_list = []
-        for mr in itertools.islice(itertools.chain(*page_list), limit):
-            rv_list.append(GitlabMergeRequest(mr))
+        def list_mrs():
+            keys = kwargs_list.keys()
+            for instance in itertools.product(*kwargs_list.values()):
+                kwargs = {key: value for key, value in zip(keys, instance) if value is not None}
+                yield project.mergerequests.list(per_page=100, **kwargs)
 
-        return rv_list
+        # the listings are paginated lazily, no further pages or listings are fetched once the limit is reached
+        return [GitlabMergeRequest(mr) for mr in itertools.islice(itertools.chain.from_iterable(list_mrs()), limit)]
 
     def create_pr(
         self,
@@ -1092,7 +1170,7 @@ class GitlabClient(ScmPlatformClientProtocol):
         Returns:
             PullRequestProtocol: An object representing the created pull request.
         """
-        project = self.gitlab.projects.get(slug)
+        project = self._get_project(slug)
         gl_mr = project.mergerequests.create(
             {
                 "source_branch": feature_branch,
@@ -1120,8 +1198,8 @@ class GitlabClient(ScmPlatformClientProtocol):
             str: The web URL of the created comment or issue.
         """
         if issue_id is not None:
-            obj = self.gitlab.projects.get(slug).issues.get(issue_id).notes.create({"body": issue_text})
+            obj = self._get_project(slug).issues.get(issue_id).notes.create({"body": issue_text})
             return obj["web_url"]
 
-        obj = self.gitlab.projects.get(slug).issues.create({"title": title, "description": issue_text})
+        obj = self._get_project(slug).issues.create({"title": title, "description": issue_text})
         return obj["web_url"]
@@ -1,3 +1,5 @@
+import functools
+
 from fastapi import FastAPI, Header, Request, Response
 from fastapi.exceptions import HTTPException
 from openai.types.chat import ChatCompletion
@@ -11,6 +13,33 @@ from patchwork.common.client.llm.openai_ import OpenAiLlmClient
 app = FastAPI()
 
 
+# the OpenAI and Anthropic clients hold their connection pools, they are reused for requests with the same API key
+@functools.lru_cache(maxsize=128)
+def _cached_openai_client(api_key: str) -> OpenAiLlmClient:
+    """Creates an OpenAI client, reusing the client created for the same API key.
+
+    Args:
+        api_key str: The API key used to authenticate with OpenAI.
+
+    Returns:
+        OpenAiLlmClient: The OpenAI client for the API key.
+    """
+    return OpenAiLlmClient(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_anthropic_client(api_key: str) -> AnthropicLlmClient:
+    """Creates an Anthropic client, reusing the client created for the same API key.
+
+    Args:
+        api_key str: The API key used to authenticate with Anthropic.
+
+    Returns:
+        AnthropicLlmClient: The Anthropic client for the API key.
+    """
+    return AnthropicLlmClient(api_key=api_key)
+
+
 @app.post("/v1/chat/completions")
 async def handle_openai(
     authorization: Annotated[str, Header()],
@@ -35,9 +64,10 @@ async def handle_openai(
     _, _, api_key = authorization.partition("Bearer ")
     body = await request.json()
 
-    openai_client = OpenAiLlmClient(api_key=api_key)
+    openai_client = _cached_openai_client(api_key)
+    # the Google client configures its API key globally when created, so it is created for every request
     google_client = GoogleLlmClient(api_key=api_key)
-    anthropic_client = AnthropicLlmClient(api_key=api_key)
+    anthropic_client = _cached_anthropic_client(api_key)
     aio_client = AioLlmClient(openai_client, google_client, anthropic_client)
     try:
         return aio_client.chat_completion(**body)
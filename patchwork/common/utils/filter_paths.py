@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from fnmatch import fnmatch
+import os
+import re
+from fnmatch import translate
 from pathlib import Path
 
 import git
@@ -48,12 +50,24 @@ class PathFilter:
         """
         self.base_path = Path(base_path)
         self.max_depth = max_depth
+        # compared case insensitively on Windows, like Path.relative_to
+        self.__base_parts = tuple(map(os.path.normcase, self.base_path.parts))
         self.__ignored_groks = ignored_groks if ignored_groks is not None else set()
         try:
             self.__repo = git.Repo(base_path, search_parent_directories=True)
             self.__ignored_groks.update(self.__get_gitignore_ignored_groks())
         except git.InvalidGitRepositoryError:
             self.__repo = None
+        # the patterns are compiled once, most paths are not ignored and are rejected by a single match of their union
+        self.__ignored_grok_patterns = [
+            (ignored_grok, re.compile(translate(os.path.normcase(ignored_grok))))
+            for ignored_grok in self.__ignored_groks
+        ]
+        self.__ignored_groks_pattern = None
+        if len(self.__ignored_grok_patterns) > 0:
+            self.__ignored_groks_pattern = re.compile(
+                "|".join(pattern.pattern for _, pattern in self.__ignored_grok_patterns)
+            )
 
     def __get_gitignore_ignored_groks(self) -> set[str]:
         """Retrieve a set of file patterns that are ignored by the .gitignore file in the current repository.
@@ -85,11 +99,17 @@ class PathFilter:
         Returns:
             str | None: The first matching ignored grok pattern as a string, or None if no match is found.
         """
+        if self.__ignored_groks_pattern is None:
+            return None
+
         file = Path(file_to_test)
-        paths_to_test = [file] + list(file.parents)
-        for ignored_grok in self.__ignored_groks:
+        paths_to_test = [os.path.normcase(path) for path in (file, *file.parents)]
+        if not any(self.__ignored_groks_pattern.match(path) for path in paths_to_test):
+            return None
+
+        for ignored_grok, pattern in self.__ignored_grok_patterns:
             for path in paths_to_test:
-                if fnmatch(str(path), ignored_grok):
+                if pattern.match(path):
                     return ignored_grok
         return None
 
@@ -102,15 +122,16 @@ class PathFilter:
         Returns:
             int | None: The depth of the file if it exceeds the maximum depth; otherwise, returns None if the max depth is -1 or the file is not within the base path.
         """
-        file = Path(file_to_test)
         if self.max_depth == -1:
             return None
 
-        try:
-            file_depth = len(file.relative_to(self.base_path).parts)
-        except ValueError:
+        file_parts = Path(file_to_test).parts
+        base_parts_count = len(self.__base_parts)
+        if tuple(map(os.path.normcase, file_parts[:base_parts_count])) != self.__base_parts:
             return None
 
+        file_depth = len(file_parts) - base_parts_count
+
         if file_depth > self.max_depth:
             return file_depth
 
@@ -38,8 +38,9 @@ def __parse_to_list_handle_dict(input_value: Mapping, possible_keys: Iterable[An
         list[str]: A list of strings corresponding to the value of the first found key, or an empty list if no keys are found.
     """
     for possible_key in possible_keys:
-        if input_value.get(possible_key) is not None:
-            return input_value.get(possible_key)
+        value = input_value.get(possible_key)
+        if value is not None:
+            return value
 
     return []
 
@@ -57,12 +58,15 @@ def __parse_to_list_handle_iterable(
     Returns:
         list[str]: A list of extracted string values from the input iterable.
     """
+    # the keys are read for every dict item, an iterator would be exhausted after the first one
+    possible_keys = tuple(possible_keys)
     rv = []
     for item in input_value:
         if isinstance(item, dict):
             for possible_key in possible_keys:
-                if item.get(possible_key) is not None:
-                    rv.append(item.get(possible_key))
+                value = item.get(possible_key)
+                if value is not None:
+                    rv.append(value)
         else:
             rv.append(item)
 
@@ -84,7 +88,8 @@ def parse_to_list(
     Returns:
         list[str]: A list of non-empty strings extracted from the input value.
     """
-    if len(input_value) < 1:
+    # truthiness rather than len() so that iterables without a length, like generators, are parsed too
+    if not input_value:
         return []
 
     if possible_delimiters is None:
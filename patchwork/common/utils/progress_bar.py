@@ -24,6 +24,8 @@ class PatchflowProgressBar:
             None: This constructor does not return a value.
         """
         self.__step_counter = Counter()
+        # the highest run count of a step, tracked as the steps run instead of searched for on every update
+        self.__max_step_count = 0
         self.__current_progress = 0.00
         self.__patchflow_name = patchflow.__class__.__name__
 
@@ -108,7 +110,7 @@ class PatchflowProgressBar:
         Returns:
             float: The increment value added to the current progress.
         """ 
-        max_counter = max(self.__step_counter.most_common()[0][1], 1)
+        max_counter = max(self.__max_step_count, 1)
         max_section = len(self.__step_counter) * max_counter
         increment = round(self.__remaining_progress / max_section, 2)
         self.__current_progress += increment
@@ -159,6 +161,9 @@ class PatchflowProgressBar:
             description=f"[bold green]Running {step.__name__}",
             advance=self.__increment_progress,
         )
-        self.__step_counter[step] += 1
+        step_count = self.__step_counter[step] + 1
+        self.__step_counter[step] = step_count
+        if step_count > self.__max_step_count:
+            self.__max_step_count = step_count
         yield
         return
@@ -0,0 +1,111 @@
+import pytest
+
+from patchwork.common.client.llm.aio import AioLlmClient
+
+
+class StubLlmClient:
+    def __init__(self, models, supports_all=False):
+        """Creates a stub client supporting the given models.
+
+        Args:
+            models set[str]: The models returned by get_models.
+            supports_all bool: Whether is_model_supported accepts any model, like an OpenAI compatible endpoint.
+
+        Returns:
+            None
+        """
+        self.models = set(models)
+        self.supports_all = supports_all
+        self.support_checks = 0
+        self.completions = []
+
+    def get_models(self):
+        return self.models
+
+    def is_model_supported(self, model):
+        self.support_checks += 1
+        return self.supports_all or model in self.models
+
+    def is_prompt_supported(self, messages, model):
+        return 42
+
+    def truncate_messages(self, messages, model):
+        return messages[:1]
+
+    def chat_completion(self, messages, model, **kwargs):
+        self.completions.append(model)
+        self.completion_kwargs = kwargs
+        return self
+
+
+class FailingStubLlmClient(StubLlmClient):
+    def get_models(self):
+        raise RuntimeError("invalid api key")
+
+
+def test_first_matching_client_is_used():
+    """Tests that a model supported by several clients is routed to the first of them."""
+    first = StubLlmClient({"model-a"})
+    second = StubLlmClient(set(), supports_all=True)
+    client = AioLlmClient(first, second)
+
+    assert client.chat_completion([], "model-a") is first
+    assert client.chat_completion([], "model-b") is second
+    assert first.completions == ["model-a"]
+    assert second.completions == ["model-b"]
+
+
+def test_only_given_parameters_are_forwarded():
+    """Tests that parameters left as NOT_GIVEN are not forwarded to the client."""
+    stub = StubLlmClient({"model-a"})
+    client = AioLlmClient(stub)
+
+    client.chat_completion([], "model-a", max_tokens=10, temperature=0)
+
+    assert stub.completion_kwargs == {"max_tokens": 10, "temperature": 0}
+
+
+def test_dispatch_is_memoized():
+    """Tests that clients are only asked about a model once, including for unsupported models."""
+    stub = StubLlmClient({"model-a"})
+    client = AioLlmClient(stub)
+
+    assert client.is_model_supported("model-a")
+    assert client.is_model_supported("model-a")
+    assert not client.is_model_supported("unknown")
+    assert not client.is_model_supported("unknown")
+    assert stub.support_checks == 2
+
+    assert client.is_prompt_supported([], "model-a") == 42
+    assert client.is_prompt_supported([], "unknown") == -1
+    assert client.truncate_messages([{"content": "a"}, {"content": "b"}], "model-a") == [{"content": "a"}]
+    assert stub.support_checks == 2
+
+
+def test_truncate_empty_messages():
+    """Tests that empty messages are returned without asking any client."""
+    stub = StubLlmClient({"model-a"})
+    client = AioLlmClient(stub)
+
+    assert client.truncate_messages(iter([]), "model-a") == []
+    assert stub.support_checks == 0
+
+
+def test_get_models():
+    """Tests that the supported models of all working clients are combined."""
+    client = AioLlmClient(StubLlmClient({"model-a"}), FailingStubLlmClient({"model-c"}), StubLlmClient({"model-b"}))
+
+    assert client.get_models() == {"model-a", "model-b"}
+
+
+def test_unsupported_model_error():
+    """Tests the error raised when no client supports the model."""
+    client = AioLlmClient(StubLlmClient({"model-a"}), FailingStubLlmClient(set()))
+
+    with pytest.raises(ValueError) as exc_info:
+        client.chat_completion([], "unknown")
+
+    assert str(exc_info.value) == (
+        "Model unknown is not supported by ['StubLlmClient', 'FailingStubLlmClient'] clients. "
+        "Please ensure that the respective API keys are correct."
+    )
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+from anthropic.types import Message, TextBlock, Usage
+
+from patchwork.common.client.llm.anthropic import AnthropicLlmClient
+
+_MODEL = "claude-3-haiku-20240307"
+
+
+@pytest.fixture
+def client(mocker):
+    """Creates an AnthropicLlmClient whose messages API returns a canned response."""
+    llm_client = AnthropicLlmClient("test-key")
+    response = Message(
+        id="msg_1",
+        type="message",
+        role="assistant",
+        model=_MODEL,
+        content=[TextBlock(type="text", text="hello")],
+        stop_reason="end_turn",
+        usage=Usage(input_tokens=3, output_tokens=5),
+    )
+    mocker.patch.object(llm_client.client.messages, "create", return_value=response)
+    return llm_client
+
+
+def test_chat_completion_converts_response(client):
+    """Tests that the Anthropic message is converted into an OpenAI chat completion."""
+    completion = client.chat_completion([{"role": "user", "content": "hi"}], _MODEL)
+
+    assert completion.choices[0].message.content == "hello"
+    assert completion.choices[0].finish_reason == "stop"
+    assert completion.usage.total_tokens == 8
+
+
+def test_chat_completion_caches_deterministic_requests(client):
+    """Tests that repeated requests with a zero temperature are answered from the cache."""
+    messages = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "hi"}]
+
+    first = client.chat_completion(messages, _MODEL, temperature=0)
+    second = client.chat_completion(messages, _MODEL, temperature=0)
+    client.chat_completion([{"role": "user", "content": "bye"}], _MODEL, temperature=0)
+
+    assert client.client.messages.create.call_count == 2
+    assert second == first
+    assert second is not first
+
+
+@pytest.mark.parametrize("temperature", [0.7, None])
+def test_chat_completion_does_not_cache_sampled_requests(client, temperature):
+    """Tests that requests which may sample differently on each call always reach the API."""
+    messages = [{"role": "user", "content": "hi"}]
+    kwargs = {} if temperature is None else dict(temperature=temperature)
+
+    client.chat_completion(messages, _MODEL, **kwargs)
+    client.chat_completion(messages, _MODEL, **kwargs)
+
+    assert client.client.messages.create.call_count == 2
+
+
+def test_chat_completion_marks_static_prefix_for_prompt_caching(client):
+    """Tests that the last system block and the response format tool are marked as cacheable."""
+    messages = [
+        {"role": "system", "content": "first"},
+        {"role": "system", "content": "second"},
+        {"role": "user", "content": "hi"},
+    ]
+    response_format = {"type": "json_schema", "json_schema": {"name": "answer", "schema": {"type": "object"}}}
+
+    client.chat_completion(messages, _MODEL, response_format=response_format)
+
+    kwargs = client.client.messages.create.call_args.kwargs
+    assert [block.get("cache_control") for block in kwargs["system"]] == [None, {"type": "ephemeral"}]
+    assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_chat_completion_does_not_mark_prompt_caching_for_legacy_models(client):
+    """Tests that models without prompt caching support get unmarked system blocks."""
+    client.chat_completion([{"role": "system", "content": "first"}, {"role": "user", "content": "hi"}], "claude-2.1")
+
+    kwargs = client.client.messages.create.call_args.kwargs
+    assert "cache_control" not in kwargs["system"][0]
+
+
+class WordEncoding:
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+@pytest.mark.parametrize(
+    "contents,expected",
+    [
+        (["one two", "three"], 160_000 - 3),
+        (["word " * 100_000, "word " * 70_000], -1),
+    ],
+)
+def test_is_prompt_supported_counts_tokens_locally(client, mocker, contents, expected):
+    """Tests that prompt sizes are counted with the local tokenizer against the model limit."""
+    mocker.patch("patchwork.common.client.llm.anthropic._get_encoding", return_value=WordEncoding())
+    messages = [{"role": "user", "content": content} for content in contents]
+
+    assert client.is_prompt_supported(messages, _MODEL) == expected
+
+
+def test_get_models(client):
+    """Tests that the allowed model prefix is reported as a single wildcard entry."""
+    assert client.get_models() == {"claude-2.0", "claude-2.1", "claude-instant-1.2", "claude-3-*"}
+
+
+def test_achat_completion_runs_concurrently(client, mocker):
+    """Tests that asynchronous completions are sent through the async client with the same arguments."""
+    messages = [{"role": "system", "content": "be brief"}, {"role": "user", "content": "hi"}]
+    async_create = mocker.AsyncMock(return_value=client.client.messages.create.return_value)
+    mocker.patch.object(client._AnthropicLlmClient__aclient.messages, "create", async_create)
+
+    async def run():
+        return await asyncio.gather(*(client.achat_completion(messages, _MODEL, max_tokens=10) for _ in range(3)))
+
+    completions = asyncio.run(run())
+
+    assert [completion.choices[0].message.content for completion in completions] == ["hello"] * 3
+    assert async_create.await_count == 3
+    client.chat_completion(messages, _MODEL, max_tokens=10)
+    assert async_create.call_args.kwargs == client.client.messages.create.call_args.kwargs
+
+
+def test_stream_chat_completion_yields_text_then_finish_reason(client, mocker):
+    """Tests that streamed text is yielded as chunks followed by a chunk with the finish reason and usage."""
+    final_message = client.client.messages.create.return_value
+    stream = mocker.MagicMock()
+    stream.text_stream = iter(["hel", "lo"])
+    stream.current_message_snapshot = final_message
+    stream.get_final_message.return_value = final_message
+    stream_manager = mocker.patch.object(client.client.messages, "stream")
+    stream_manager.return_value.__enter__.return_value = stream
+
+    chunks = list(client.stream_chat_completion([{"role": "user", "content": "hi"}], _MODEL))
+
+    assert [chunk.choices[0].delta.content for chunk in chunks] == ["hel", "lo", None]
+    assert chunks[-1].choices[0].finish_reason == "stop"
+    assert chunks[-1].usage.total_tokens == 8
+    assert {chunk.id for chunk in chunks} == {"msg_1"}
+    assert stream_manager.call_args.kwargs["max_tokens"] == 1000
+
+
+def test_stream_chat_completion_falls_back_for_json_schema(client, mocker):
+    """Tests that structured responses are requested without streaming and yielded as one chunk."""
+    stream_manager = mocker.patch.object(client.client.messages, "stream")
+    response_format = {"type": "json_schema", "json_schema": {"name": "answer", "schema": {"type": "object"}}}
+
+    chunks = list(
+        client.stream_chat_completion([{"role": "user", "content": "hi"}], _MODEL, response_format=response_format)
+    )
+
+    stream_manager.assert_not_called()
+    assert len(chunks) == 1
+    assert chunks[0].choices[0].delta.content == "hello"
+    assert chunks[0].choices[0].finish_reason == "stop"
+
+
+def test_is_prompt_supported_decides_on_exact_count(client, mocker):
+    """Tests that a prompt of long tokens fits on its exact count, even when four characters per token would not."""
+    mocker.patch("patchwork.common.client.llm.anthropic._get_encoding", return_value=WordEncoding())
+    # 150_000 tokens of 5 characters each, 187_500 tokens at four characters per token
+    messages = [{"role": "user", "content": "word " * 150_000}]
+
+    assert client.is_prompt_supported(messages, _MODEL) == 160_000 - 150_000
+
+
+def test_chat_completion_sends_only_given_arguments(client):
+    """Tests that arguments which are not given or None are left out of the API request."""
+    client.chat_completion([{"role": "user", "content": "hi"}], _MODEL, stop="END", temperature=None, top_p=0.5)
+
+    assert client.client.messages.create.call_args.kwargs == dict(
+        messages=[{"role": "user", "content": "hi"}],
+        max_tokens=1000,
+        model=_MODEL,
+        stop_sequences=["END"],
+        top_p=0.5,
+    )
@@ -0,0 +1,201 @@
+import asyncio
+
+import google.ai.generativelanguage as glm
+import pytest
+from google.generativeai.types.generation_types import GenerateContentResponse
+
+from patchwork.common.client.llm.google import (
+    GoogleLlmClient,
+    _cached_generative_async_client,
+    _cached_generative_client,
+    _cached_generative_model,
+    _cached_google_schema,
+    _cached_model_limits,
+    _cached_model_names,
+)
+from patchwork.common.client.llm.utils import json_schema_to_model
+
+_MODEL = "gemini-1.5-flash"
+
+
+@pytest.fixture
+def response():
+    """Creates a Google response with a text, an inline data and another text part."""
+    candidate = glm.Candidate(
+        index=0,
+        finish_reason=2,
+        content=glm.Content(
+            role="model",
+            parts=[
+                glm.Part(text="hello"),
+                glm.Part(inline_data=glm.Blob(mime_type="image/png", data=b"png")),
+                glm.Part(text="world"),
+            ],
+        ),
+    )
+    return GenerateContentResponse.from_response(
+        glm.GenerateContentResponse(
+            candidates=[candidate],
+            usage_metadata=dict(prompt_token_count=3, candidates_token_count=5, total_token_count=8),
+        )
+    )
+
+
+@pytest.fixture
+def generative_model(mocker, response):
+    """Replaces the GenerativeModel factory with a mock returning the canned response."""
+    model = mocker.Mock()
+    model.generate_content.return_value = response
+    model.generate_content_async = mocker.AsyncMock(return_value=response)
+    mocker.patch("patchwork.common.client.llm.google._cached_generative_model", return_value=model)
+    return model
+
+
+def test_chat_completion_converts_response(generative_model):
+    """Tests that the text parts of a Google candidate are converted into an OpenAI chat completion."""
+    client = GoogleLlmClient("test-key")
+    messages = [
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+
+    completion = client.chat_completion(messages, _MODEL)
+
+    assert completion.choices[0].message.content == "hello\nworld"
+    assert completion.choices[0].finish_reason == "length"
+    assert completion.usage.total_tokens == 8
+    generative_model.generate_content.assert_called_once_with(
+        contents=[
+            dict(role="user", parts=[dict(text="hi")]),
+            dict(role="model", parts=[dict(text="hello")]),
+        ]
+    )
+
+
+def test_achat_completion_runs_concurrently(generative_model):
+    """Tests that asynchronous completions are generated through the async Google API."""
+    client = GoogleLlmClient("test-key")
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def run():
+        return await asyncio.gather(*(client.achat_completion(messages, _MODEL) for _ in range(3)))
+
+    completions = asyncio.run(run())
+
+    assert [completion.choices[0].message.content for completion in completions] == ["hello\nworld"] * 3
+    assert generative_model.generate_content_async.await_count == 3
+    generative_model.generate_content.assert_not_called()
+
+
+def test_json_schema_to_google_schema_is_cached(mocker):
+    """Tests that a schema is converted once and callers receive independent copies."""
+    _cached_google_schema.cache_clear()
+    converter = mocker.patch("patchwork.common.client.llm.google.json_schema_to_model", wraps=json_schema_to_model)
+    json_schema = {
+        "title": "CachedAnswer",
+        "type": "object",
+        "properties": {"answer": {"type": "string"}},
+        "required": ["answer"],
+    }
+
+    first = GoogleLlmClient.json_schema_to_google_schema(json_schema)
+    second = GoogleLlmClient.json_schema_to_google_schema(dict(reversed(json_schema.items())))
+    first["properties"]["answer"]["type"] = "changed"
+
+    assert converter.call_count == 1
+    assert second["properties"]["answer"]["type"] == "string"
+    assert GoogleLlmClient.json_schema_to_google_schema(None) is None
+
+
+def test_model_limits(mocker):
+    """Tests that model limits and names are looked up without the "models/" prefix."""
+    models = [mocker.Mock(input_token_limit=limit) for limit in (1_048_576, 32_768)]
+    models[0].name = "models/gemini-1.5-flash"
+    models[1].name = "models/gemini-1.0-pro"
+    mocker.patch("patchwork.common.client.llm.google._cached_list_model_from_google", return_value=models)
+    _cached_model_limits.cache_clear()
+    _cached_model_names.cache_clear()
+    client = GoogleLlmClient("test-key")
+
+    assert client.get_models() == {"gemini-1.5-flash", "gemini-1.0-pro"}
+    assert client.get_models() is client.get_models()
+    assert client.is_model_supported("gemini-1.5-flash")
+    assert not client.is_model_supported("models/gemini-1.5-flash")
+    assert client._GoogleLlmClient__get_model_limits("gemini-1.0-pro") == 32_768
+    assert client._GoogleLlmClient__get_model_limits("unknown") == 1_000_000
+    _cached_model_limits.cache_clear()
+    _cached_model_names.cache_clear()
+
+
+@pytest.fixture
+def service_clients(mocker, response):
+    """Replaces the generative service clients with mocks recording the API key each one was created with."""
+    _cached_generative_model.cache_clear()
+    _cached_generative_client.cache_clear()
+    _cached_generative_async_client.cache_clear()
+    raw_response = type(response._result).pb(response._result)
+
+    def service_client(client_options):
+        client = mocker.Mock(api_key=client_options["api_key"])
+        client.generate_content.return_value = glm.GenerateContentResponse(raw_response)
+        client.count_tokens.return_value = glm.CountTokensResponse(total_tokens=3)
+        return client
+
+    def async_service_client(client_options):
+        client = service_client(client_options)
+        client.generate_content = mocker.AsyncMock(return_value=client.generate_content.return_value)
+        return client
+
+    mocker.patch("patchwork.common.client.llm.google.glm.GenerativeServiceClient", side_effect=service_client)
+    mocker.patch(
+        "patchwork.common.client.llm.google.glm.GenerativeServiceAsyncClient", side_effect=async_service_client
+    )
+    mocker.patch("patchwork.common.client.llm.google._cached_model_limits", return_value={_MODEL: 1_000})
+    yield
+    _cached_generative_model.cache_clear()
+    _cached_generative_client.cache_clear()
+    _cached_generative_async_client.cache_clear()
+
+
+def test_requests_use_their_client_api_key(service_clients):
+    """Tests that clients created with different API keys each send their requests with their own key."""
+    first_client = GoogleLlmClient("KEY_A")
+    second_client = GoogleLlmClient("KEY_B")
+    messages = [{"role": "user", "content": "hi"}]
+
+    first_client.chat_completion(messages, _MODEL)
+    second_client.chat_completion(messages, _MODEL)
+    first_client.is_prompt_supported(messages, _MODEL)
+
+    first_model = _cached_generative_model("KEY_A", _MODEL, None)
+    assert first_model._client.api_key == "KEY_A"
+    assert first_model._client.count_tokens.call_count == 1
+    assert _cached_generative_model("KEY_B", _MODEL, None)._client.api_key == "KEY_B"
+    assert _cached_generative_client("KEY_A").generate_content.call_count == 1
+    assert _cached_generative_client("KEY_B").generate_content.call_count == 1
+
+
+def test_async_requests_use_their_client_api_key(service_clients):
+    """Tests that asynchronous requests of clients with different API keys each use their own key."""
+    first_client = GoogleLlmClient("KEY_A")
+    second_client = GoogleLlmClient("KEY_B")
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def run():
+        await first_client.achat_completion(messages, _MODEL)
+        await second_client.achat_completion(messages, _MODEL)
+
+    asyncio.run(run())
+
+    assert _cached_generative_async_client("KEY_A").generate_content.await_count == 1
+    assert _cached_generative_async_client("KEY_B").generate_content.await_count == 1
+
+
+def test_is_prompt_supported_decides_on_exact_count(service_clients):
+    """Tests that a prompt fits on its exact token count, even when four characters per token would not."""
+    client = GoogleLlmClient("KEY_A")
+    # 4_800 characters of indentation, 1_200 tokens at four characters per token against a limit of 1_000
+    messages = [{"role": "user", "content": " " * 4_800}]
+
+    assert client.is_prompt_supported(messages, _MODEL) == 1_000 - 3
@@ -0,0 +1,12 @@
+from patchwork.common.client.llm.openai_ import OpenAiLlmClient
+
+
+def test_chat_completion_sends_only_given_arguments(mocker):
+    """Tests that parameters left as NOT_GIVEN are not sent while explicit None values are."""
+    client = OpenAiLlmClient("test-key")
+    create = mocker.patch.object(client.client.chat.completions, "create")
+    messages = [{"role": "user", "content": "hi"}]
+
+    client.chat_completion(messages, "gpt-4o", max_tokens=10, temperature=None)
+
+    create.assert_called_once_with(messages=messages, model="gpt-4o", max_tokens=10, temperature=None)
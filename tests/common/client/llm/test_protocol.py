@@ -0,0 +1,101 @@
+import pytest
+import tiktoken
+
+from patchwork.common.client.llm.protocol import NOT_GIVEN, LlmClient, NotGiven
+
+# every byte is a token, so token counts are predictable without downloading an encoding
+_BYTE_ENCODING = tiktoken.Encoding(
+    name="bytes",
+    pat_str=r"[\s\S]",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={},
+)
+
+
+class StubLlmClient(LlmClient):
+    def __init__(self, model_limit, has_encoding=True):
+        """Creates a client counting one token per byte of content.
+
+        Args:
+            model_limit int: The number of tokens the model accepts.
+            has_encoding bool: Whether the tokenizer is exposed for truncation.
+
+        Returns:
+            None
+        """
+        self.model_limit = model_limit
+        self.has_encoding = has_encoding
+        self.prompt_checks = 0
+
+    def _get_encoding(self, model):
+        return _BYTE_ENCODING if self.has_encoding else None
+
+    def is_prompt_supported(self, messages, model):
+        self.prompt_checks += 1
+        token_count = sum(len(message.get("content").encode()) for message in messages)
+        return self.model_limit - token_count
+
+
+@pytest.mark.parametrize("has_encoding", [True, False])
+def test_truncate_messages_cuts_last_fitting_message(has_encoding):
+    """Tests that messages after the budget are dropped and the overflowing one is cut to the budget."""
+    client = StubLlmClient(model_limit=1_000, has_encoding=has_encoding)
+    messages = [
+        {"role": "system", "content": "s" * 300},
+        {"role": "user", "content": "u" * 400},
+        {"role": "user", "content": "dropped"},
+    ]
+
+    truncated = LlmClient._truncate_messages(client, messages, "model")
+
+    assert [message["content"] for message in truncated] == ["s" * 300, "u" * 200]
+
+
+def test_truncate_messages_checks_prompt_once():
+    """Tests that a local tokenizer replaces the prompt checks of each growing message prefix."""
+    client = StubLlmClient(model_limit=1_000)
+    messages = [{"role": "system", "content": "s" * 300}, {"role": "user", "content": "u" * 100_000}]
+
+    LlmClient._truncate_messages(client, messages, "model")
+
+    assert client.prompt_checks == 1
+
+
+def test_truncate_messages_keeps_whole_characters():
+    """Tests that a cut falling inside a multibyte character drops that character."""
+    client = StubLlmClient(model_limit=505)
+    messages = [{"role": "user", "content": "é" * 10}]
+
+    truncated = LlmClient._truncate_messages(client, messages, "model")
+
+    assert truncated[0]["content"] == "é" * 2
+
+
+def test_remove_not_given():
+    """Tests that NOT_GIVEN is stripped from nested containers and clean containers are returned as is."""
+    clean = {"model": "m", "stop": ["a"], "temperature": None}
+    nested = {"model": "m", "top_p": NOT_GIVEN, "extra": {"a": NOT_GIVEN, "b": [1, NOT_GIVEN]}}
+
+    assert NotGiven.remove_not_given(clean) is clean
+    assert NotGiven.remove_not_given(nested) == {"model": "m", "extra": {"b": [1]}}
+    assert NotGiven.remove_not_given(NOT_GIVEN) is None
+
+
+@pytest.mark.parametrize("size", [1, 2, 37, 500, 999])
+def test_truncate_message_finds_exact_fit(size):
+    """Tests that bisection returns the prefix the callback reports as an exact fit."""
+    message = "x" * 1_000
+
+    truncated = LlmClient._LlmClient__truncate_message(message, lambda text: size - len(text), 1, len(message))
+
+    assert truncated == message[:size]
+
+
+def test_truncate_message_without_exact_fit():
+    """Tests that bisection ends with the longest fitting prefix when no length fits exactly."""
+    message = "x" * 1_000
+
+    # two tokens per character against an odd limit, the remaining budget is never zero
+    truncated = LlmClient._LlmClient__truncate_message(message, lambda text: 301 - 2 * len(text), 1, len(message))
+
+    assert truncated == message[:150]
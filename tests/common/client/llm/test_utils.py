@@ -0,0 +1,128 @@
+import json
+from typing import Any, List, Optional
+
+from openai.types.chat import ChatCompletion
+
+from patchwork.common.client.llm import utils
+from patchwork.common.client.llm.utils import (
+    ResponseCache,
+    _cached_example_json_to_schema,
+    example_json_to_schema,
+    json_schema_to_model,
+)
+
+
+def _completion(content: str) -> ChatCompletion:
+    return ChatCompletion(
+        id="-1",
+        choices=[dict(finish_reason="stop", index=0, message=dict(role="assistant", content=content))],
+        created=0,
+        model="model",
+        object="chat.completion",
+    )
+
+
+def test_response_cache_evicts_least_recently_used():
+    """Tests that the least recently used response is evicted once the cache is full."""
+    cache = ResponseCache(maxsize=2)
+    keys = [ResponseCache.key(dict(messages=[content])) for content in ("a", "b", "c")]
+
+    cache.put(keys[0], _completion("a"))
+    cache.put(keys[1], _completion("b"))
+    assert cache.get(keys[0]).choices[0].message.content == "a"
+    cache.put(keys[2], _completion("c"))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]).choices[0].message.content == "a"
+    assert cache.get(keys[2]).choices[0].message.content == "c"
+
+
+def test_response_cache_key_ignores_dict_order():
+    """Tests that payloads differing only in key order share a cache key."""
+    assert ResponseCache.key(dict(model="m", temperature=0)) == ResponseCache.key(dict(temperature=0, model="m"))
+
+
+def test_example_json_to_schema_is_cached(mocker):
+    """Tests that an example is converted once, equally for its string and dict forms, into independent copies."""
+    _cached_example_json_to_schema.cache_clear()
+    converter = mocker.patch("patchwork.common.client.llm.utils.base_model_to_schema", wraps=utils.base_model_to_schema)
+    example = {"summary": "a short summary", "score": 1}
+
+    first = example_json_to_schema(example)
+    second = example_json_to_schema(json.dumps(example))
+    first["json_schema"]["name"] = "changed"
+
+    assert converter.call_count == 1
+    assert second["json_schema"]["name"] != "changed"
+    assert list(second["json_schema"]["schema"]["properties"]) == ["summary", "score"]
+    assert example_json_to_schema(None) is None
+
+
+def test_json_schema_to_model_is_cached():
+    """Tests that the same schema yields the same model class with fields in property order."""
+    json_schema = {
+        "title": "Answer",
+        "type": "object",
+        "properties": {"text": {"type": "string"}, "count": {"type": "integer"}},
+        "required": ["text"],
+    }
+
+    model = json_schema_to_model(json_schema)
+
+    assert json_schema_to_model(dict(json_schema)) is model
+    assert list(model.model_fields) == ["text", "count"]
+
+
+def test_json_schema_to_model_field_types():
+    """Tests that primitive, array, nested and nullable schema types map to the expected field annotations."""
+    json_schema = {
+        "title": "Typed",
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "scores": {"type": "array", "items": {"type": "number"}},
+            "flag": {"type": "boolean"},
+            "nothing": {"type": "null"},
+        },
+        "required": ["name", "scores", "flag", "nothing"],
+    }
+
+    fields = json_schema_to_model(json_schema).model_fields
+
+    assert fields["name"].annotation is str
+    assert fields["scores"].annotation == List[float]
+    assert fields["flag"].annotation is bool
+    assert fields["nothing"].annotation == Optional[Any]
+
+
+def test_example_json_to_schema_shares_identical_nested_models(mocker):
+    """Tests that nested examples with the same keys, types and descriptions are built into one model."""
+    _cached_example_json_to_schema.cache_clear()
+    converter = mocker.patch("patchwork.common.client.llm.utils.base_model_to_schema", wraps=utils.base_model_to_schema)
+    nested = {"path": "the file path", "line": 1}
+
+    example_json_to_schema({"first": nested, "second": [dict(nested)], "third": {**nested, "path": "other"}})
+
+    fields = converter.call_args.args[0].model_fields
+    assert fields["second"].annotation == List[fields["first"].annotation]
+    assert fields["third"].annotation is not fields["first"].annotation
+    assert fields["third"].annotation.model_fields["path"].description == "other"
+
+
+def test_example_json_to_schema_deduplicates_defs():
+    """Tests that identical nested examples share one $defs entry, while differing ones keep their own."""
+    _cached_example_json_to_schema.cache_clear()
+    nested = {"path": "the file path", "line": 1}
+
+    schema = example_json_to_schema({"first": nested, "second": [dict(nested)], "third": {**nested, "path": "other"}})
+
+    schema = schema["json_schema"]["schema"]
+    properties = schema["properties"]
+    assert len(schema["$defs"]) == 2
+    assert properties["first"]["$ref"] == properties["second"]["items"]["$ref"]
+    assert properties["third"]["$ref"] != properties["first"]["$ref"]
+    descriptions = {
+        ref: schema["$defs"][ref.removeprefix("#/$defs/")]["properties"]["path"]["description"]
+        for ref in (properties["first"]["$ref"], properties["third"]["$ref"])
+    }
+    assert descriptions == {properties["first"]["$ref"]: "the file path", properties["third"]["$ref"]: "other"}
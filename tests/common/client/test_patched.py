@@ -0,0 +1,132 @@
+from threading import get_ident
+
+import requests
+
+from patchwork.common.client.patched import (
+    PatchedClient,
+    TCPKeepAliveHTTPSConnectionPool,
+    _telemetry_environment,
+)
+
+_URL = "https://patched.example"
+
+
+def test_requests_share_auth_headers(mocker):
+    """Tests that requests go to the precomputed endpoints with the session wide authorization header."""
+    client = PatchedClient("token", _URL)
+    request = mocker.patch.object(client._session, "request")
+    request.return_value.ok = True
+    request.return_value.json.return_value = {"msg": "ok"}
+
+    assert client.test_token()
+    request.assert_called_once_with("POST", url=f"{_URL}/token/test", json={})
+    assert client._session.headers["Authorization"] == "Bearer token"
+
+
+def test_request_failure_returns_none(mocker):
+    """Tests that connection failures are logged and reported as a missing response."""
+    client = PatchedClient("token", _URL)
+    mocker.patch.object(client._session, "request", side_effect=requests.ConnectionError("down"))
+
+    assert client._get(url=_URL) is None
+    assert not client.test_token()
+
+
+def test_public_telemetry_reuses_background_worker(mocker):
+    """Tests that telemetry events are sent on one background thread and drained on shutdown."""
+    client = PatchedClient("token", _URL)
+    mocker.patch("patchwork.common.client.patched.get_user_config", return_value=mocker.Mock(id="client"))
+    mocker.patch("patchwork.common.client.patched._telemetry_environment", return_value={})
+    threads = []
+    post = mocker.patch.object(client._telemetry_session, "post", side_effect=lambda **_: threads.append(get_ident()))
+
+    for _ in range(3):
+        client.send_public_telemetry("AutoFix", {"model": "gpt-4o"})
+    client._stop_public_telemetry()
+
+    assert post.call_count == 3
+    assert len(set(threads)) == 1
+    assert threads[0] != get_ident()
+    assert post.call_args.kwargs["url"] == f"{_URL}/v1/telemetry/"
+    assert post.call_args.kwargs["timeout"] == PatchedClient.TELEMETRY_TIMEOUT
+
+
+def test_telemetry_inputs_mask_disallowed_values():
+    """Tests that only allowed telemetry inputs keep their values and the others are reported as set."""
+    client = PatchedClient("token", _URL)
+
+    masked = client._PatchedClient__handle_telemetry_inputs({"model": "gpt-4o", "openai_api_key": "secret"})
+
+    assert masked == {"model": "gpt-4o", "openai_api_key": True}
+    assert client._PatchedClient__handle_telemetry_inputs({}) == {}
+
+
+def test_keepalive_sockopts_are_applied(mocker):
+    """Tests that the precomputed keep-alive socket options are set on each validated connection."""
+    mocker.patch("patchwork.common.client.patched.HTTPSConnectionPool._validate_conn")
+    conn = mocker.Mock()
+
+    TCPKeepAliveHTTPSConnectionPool("patched.example")._validate_conn(conn)
+
+    assert conn.sock.setsockopt.call_args_list == [
+        mocker.call(*sockopt) for sockopt in TCPKeepAliveHTTPSConnectionPool._KEEPALIVE_SOCKOPTS
+    ]
+
+
+def test_server_errors_are_retried():
+    """Tests that https requests are retried on transient server errors with backoff."""
+    client = PatchedClient("token", _URL)
+
+    retries = client._session.get_adapter(_URL).max_retries
+
+    assert retries.total == 3
+    assert retries.backoff_factor > 0
+    assert retries.is_retry("POST", 503)
+    assert not retries.is_retry("POST", 404)
+
+
+def test_run_records_are_not_retried_on_post():
+    """Tests that creating a patchflow run record is not retried, as a retry could record the run twice."""
+    client = PatchedClient("token", _URL)
+
+    retries = client._session.get_adapter(f"{_URL}/v1/patchwork/").max_retries
+
+    assert not retries.is_retry("POST", 503)
+    assert retries.is_retry("GET", 503)
+    assert client._session.get_adapter(f"{_URL}/token/test").max_retries.is_retry("POST", 503)
+
+
+def test_telemetry_environment_is_looked_up_once(mocker):
+    """Tests that the environment, including the installed cli version, is only looked up once."""
+    _telemetry_environment.cache_clear()
+    version = mocker.patch("patchwork.common.client.patched.metadata.version", return_value="0.0.0")
+
+    assert _telemetry_environment() is _telemetry_environment()
+    assert _telemetry_environment()["cli_version"] == "0.0.0"
+    version.assert_called_once_with("patchwork-cli")
+    _telemetry_environment.cache_clear()
+
+
+def test_patched_telemetry_records_run_with_repo_details(mocker):
+    """Tests that the remote url and branch are read once and sent with both patchflow run records."""
+    client = PatchedClient("token", _URL)
+    mocker.patch.object(client, "test_token", return_value=True)
+    repo = mocker.patch("patchwork.common.client.patched.Repo").return_value
+    repo.remotes.origin.url = "https://github.com/org/repo.git"
+    mocker.patch("patchwork.common.client.patched.get_current_branch").return_value.configure_mock(
+        name="main", **{"is_remote.return_value": False}
+    )
+    post = mocker.patch.object(client, "_post")
+    post.return_value.json.return_value = {"id": 7}
+
+    with client.patched_telemetry("AutoFix", {"model": "gpt-4o"}):
+        pass
+
+    record, finish = (call.kwargs["json"] for call in post.call_args_list)
+    assert record == {
+        "url": repo.remotes.origin.url,
+        "patchflow": "AutoFix",
+        "branch": "main",
+        "inputs": {"model": "gpt-4o"},
+    }
+    assert finish == {"id": 7, "url": repo.remotes.origin.url, "patchflow": "AutoFix"}
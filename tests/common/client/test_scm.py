@@ -0,0 +1,392 @@
+import hashlib
+
+import pytest
+
+from patchwork.common.client.scm import (
+    _COMMENT_MARKER,
+    _PR_LINK_FORMATS,
+    GithubClient,
+    GithubPullRequest,
+    GitlabClient,
+    GitlabMergeRequest,
+    PullRequestProtocol,
+    PullRequestState,
+    _cached_github,
+    _cached_gitlab,
+    get_slug_from_remote_url,
+)
+
+
+@pytest.mark.parametrize(
+    "remote_url,slug",
+    [
+        ("https://github.com/org/repo.git", "org/repo"),
+        ("git@github.com:org/repo.git", "org/repo"),
+        ("https://gitlab.com/org/group/subgroup/repo.git", "org/group/subgroup/repo"),
+    ],
+)
+def test_get_slug_from_remote_url(remote_url, slug):
+    """Tests that the slug includes the owner, any groups and the repository name."""
+    assert get_slug_from_remote_url(remote_url) == slug
+
+
+def test_get_slug_from_remote_url_parses_once(mocker):
+    """Tests that a remote url is parsed once and its slug reused afterwards."""
+    get_slug_from_remote_url.cache_clear()
+    parse = mocker.patch("patchwork.common.client.scm.parse")
+    parse.return_value.configure_mock(owner="org", groups=[], name="repo")
+
+    assert get_slug_from_remote_url("https://github.com/org/repo") == "org/repo"
+    assert get_slug_from_remote_url("https://github.com/org/repo") == "org/repo"
+    parse.assert_called_once()
+    get_slug_from_remote_url.cache_clear()
+
+
+_PR_URL = "https://github.com/org/repo/pull/1"
+_PATH_ANCHOR = hashlib.sha256(b"src/app.py").hexdigest()
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        ("no placeholders", "no placeholders"),
+        ("see {{src/app.py}}", f"see {_PR_URL}/files#diff-{_PATH_ANCHOR}"),
+        ("see {{src/app.py:3:7}}.", f"see {_PR_URL}/files#diff-{_PATH_ANCHOR}L3-L7."),
+        ("see {{src/app.py:3:7:ignored:too}}", f"see {_PR_URL}/files#diff-{_PATH_ANCHOR}L3-L7"),
+        ("see {{src/app.py:3}}", f"see {_PR_URL}/files#diff-{_PATH_ANCHOR}"),
+        (
+            "{{a}} and {{b}}",
+            f"{_PR_URL}/files#diff-{hashlib.sha256(b'a').hexdigest()} and "
+            f"{_PR_URL}/files#diff-{hashlib.sha256(b'b').hexdigest()}",
+        ),
+        ("unclosed {{src/app.py", "unclosed {{src/app.py"),
+    ],
+)
+def test_apply_pr_template_github(mocker, body, expected):
+    """Tests that placeholders are replaced by links to the files and lines of a GitHub pull request."""
+    pr = GithubPullRequest(mocker.Mock(html_url=_PR_URL))
+
+    assert PullRequestProtocol._apply_pr_template(pr, body) == expected
+
+
+def test_apply_pr_template_gitlab(mocker):
+    """Tests that placeholders are replaced by links to the file diffs of a GitLab merge request."""
+    mr = GitlabMergeRequest(mocker.Mock(web_url="https://gitlab.com/org/repo/-/merge_requests/1"))
+
+    assert PullRequestProtocol._apply_pr_template(mr, "see {{src/app.py:3:7}}") == (
+        f"see https://gitlab.com/org/repo/-/merge_requests/1/diffs#{hashlib.sha1(b'src/app.py').hexdigest()}"
+    )
+
+
+def test_apply_pr_template_unknown_platform(mocker):
+    """Tests that a pull request of an unknown platform is replaced by its url."""
+    pr = mocker.Mock(spec=PullRequestProtocol)
+    pr.url.return_value = _PR_URL
+
+    assert PullRequestProtocol._apply_pr_template(pr, "see {{src/app.py}}") == _PR_URL
+
+
+def test_apply_pr_template_reads_url_once(mocker):
+    """Tests that the pull request url is read once for all placeholders in the body."""
+    pr = GithubPullRequest(mocker.Mock())
+    url = mocker.patch.object(pr, "url", return_value=_PR_URL)
+
+    PullRequestProtocol._apply_pr_template(pr, "{{a}} {{b}} {{c:1:2}}")
+
+    url.assert_called_once()
+
+
+def test_apply_pr_template_hashes_each_path_once(mocker):
+    """Tests that a path linked by several placeholders is hashed once."""
+    pr = GithubPullRequest(mocker.Mock(html_url=_PR_URL))
+    *link_formats, anchor_hash = _PR_LINK_FORMATS[GithubPullRequest]
+    sha256 = mocker.Mock(wraps=anchor_hash)
+    mocker.patch.dict(_PR_LINK_FORMATS, {GithubPullRequest: (*link_formats, sha256)})
+
+    body = PullRequestProtocol._apply_pr_template(pr, "{{src/app.py}} {{src/app.py:1:2}} {{src/app.py:5:9}}")
+
+    sha256.assert_called_once_with(b"src/app.py")
+    assert body.count(_PATH_ANCHOR) == 3
+
+
+def test_gitlab_merge_request_texts_fetches_latest_diff_only(mocker):
+    """Tests that only the newest diff version is listed and its non binary file diffs are returned."""
+    mr = mocker.Mock(title="title", description="body")
+    mr.notes.list.return_value = []
+    mr.diffs.list.return_value = [mocker.Mock(id=2)]
+    mr.diffs.get.return_value.diffs = [
+        dict(new_path="a.py", diff="@@ -1 +1 @@"),
+        dict(new_path="b.png", diff="Binary files differ"),
+    ]
+
+    texts = GitlabMergeRequest(mr).texts()
+
+    mr.diffs.list.assert_called_once_with(per_page=1, get_all=False)
+    mr.diffs.get.assert_called_once_with(2)
+    assert texts["diffs"] == {"a.py": "@@ -1 +1 @@"}
+
+
+def test_gitlab_merge_request_texts_keeps_user_notes(mocker):
+    """Tests that system notes and notes without author or body are left out of the comments."""
+    mr = mocker.Mock(title="title", description="body")
+    mr.notes.list.return_value = [
+        mocker.Mock(system=False, author={"username": "dev"}, body="looks good"),
+        mocker.Mock(system=True, author={"username": "bot"}, body="added 1 commit"),
+        mocker.Mock(system=False, author=None, body="orphan"),
+        mocker.Mock(system=False, author={}, body="anonymous"),
+    ]
+    mr.diffs.list.return_value = []
+
+    texts = GitlabMergeRequest(mr).texts()
+
+    mr.notes.list.assert_called_once_with(iterator=True, per_page=100)
+    assert texts["comments"] == [dict(user="dev", body="looks good"), dict(user="", body="anonymous")]
+
+
+def test_gitlab_merge_request_texts_stops_at_caps(mocker):
+    """Tests that notes stop being read once enough comments are kept and that diffs are capped."""
+    mr = mocker.Mock(title="title", description="body")
+    kept = mocker.Mock(system=False, author={"username": "dev"}, body="looks good")
+    system = mocker.Mock(system=True, author={"username": "bot"}, body="added 1 commit")
+    mr.notes.list.return_value = iter([system, kept, kept, mocker.Mock()])
+    mr.diffs.list.return_value = [mocker.Mock(id=2)]
+    mr.diffs.get.return_value.diffs = [
+        dict(new_path="b.png", diff="Binary files differ"),
+        dict(new_path="a.py", diff="@@ -1 +1 @@"),
+        dict(new_path="c.py", diff="@@ -2 +2 @@"),
+    ]
+
+    texts = GitlabMergeRequest(mr).texts(max_files=1, max_comments=2)
+
+    assert texts["comments"] == [dict(user="dev", body="looks good")] * 2
+    assert texts["diffs"] == {"a.py": "@@ -1 +1 @@"}
+
+
+def test_github_pull_request_texts_stops_at_caps(mocker):
+    """Tests that comment and file listings are only consumed up to the requested caps."""
+    pr = mocker.Mock(title="title", body=None)
+    consumed = []
+
+    def listing(name, items):
+        for item in items:
+            consumed.append(name)
+            yield item
+
+    comment = mocker.Mock(body="looks good")
+    comment.user.configure_mock(name="dev")
+    pr.get_comments.return_value = listing("comment", [comment])
+    pr.get_issue_comments.return_value = listing("issue comment", [comment, comment])
+    files = [mocker.Mock(filename="b.png", patch=None)]
+    files += [mocker.Mock(filename=name, patch=f"@@ {name} @@") for name in ("a.py", "c.py", "d.py")]
+    pr.get_files.return_value = listing("file", files)
+
+    texts = GithubPullRequest(pr).texts(max_files=2, max_comments=2)
+
+    assert texts["body"] == ""
+    assert texts["comments"] == [dict(user="dev", body="looks good")] * 2
+    assert texts["diffs"] == {"a.py": "@@ a.py @@", "c.py": "@@ c.py @@"}
+    assert consumed == ["comment", "issue comment", "file", "file", "file"]
+    assert GithubPullRequest(pr).texts()["diffs"] == {"d.py": "@@ d.py @@"}
+
+
+def test_github_find_prs_lists_once_and_filters_branches(mocker):
+    """Tests that pull requests are listed with a single query and filtered by their base and head branches."""
+    client = GithubClient("token")
+    repo = mocker.patch.object(
+        GithubClient, "github", new_callable=mocker.PropertyMock
+    ).return_value.get_repo.return_value
+    prs = [
+        mocker.Mock(base=mocker.Mock(ref="main"), head=mocker.Mock(ref="feature")),
+        mocker.Mock(base=mocker.Mock(ref="main"), head=mocker.Mock(ref="other")),
+        mocker.Mock(base=mocker.Mock(ref="develop"), head=mocker.Mock(ref="feature")),
+    ]
+    repo.get_pulls.return_value = prs
+
+    found = client.find_prs("org/repo", state=PullRequestState.OPEN, original_branch="main", feature_branch="feature")
+
+    repo.get_pulls.assert_called_once_with(state="open", base="main", head="org:feature")
+    assert [pr._pr for pr in found] == prs[:1]
+
+
+def test_github_find_prs_limits_matching_prs(mocker):
+    """Tests that the limit counts only the pull requests matching the branches."""
+    client = GithubClient("token")
+    repo = mocker.patch.object(
+        GithubClient, "github", new_callable=mocker.PropertyMock
+    ).return_value.get_repo.return_value
+    prs = [mocker.Mock(head=mocker.Mock(ref=ref)) for ref in ("other", "feature", "feature")]
+    repo.get_pulls.return_value = prs
+
+    found = client.find_prs("org/repo", feature_branch="feature", limit=1)
+
+    assert [pr._pr for pr in found] == prs[1:2]
+
+
+@pytest.mark.parametrize(
+    "feature_branch,limit,per_page",
+    [(None, 5, 5), (None, 500, 100), (None, None, 100), ("feature", 5, 5)],
+)
+def test_github_find_prs_sizes_pages_to_limit(mocker, feature_branch, limit, per_page):
+    """Tests that the listing is created with full pages, or pages of the limit when there is one."""
+    client = GithubClient("token")
+    github = mocker.patch.object(GithubClient, "github", new_callable=mocker.PropertyMock).return_value
+    github.per_page = 30
+    page_sizes = []
+    github.get_repo.return_value.get_pulls.side_effect = lambda **_: page_sizes.append(github.per_page) or []
+
+    client.find_prs("org/repo", feature_branch=feature_branch, limit=limit)
+
+    assert page_sizes == [per_page]
+    assert github.per_page == 30
+
+
+def test_github_reset_comments_deletes_marked_comments(mocker):
+    """Tests that only comments starting with the marker are deleted, skipping comments without a body."""
+    pr = mocker.Mock()
+    marked = mocker.Mock(body=f"{_COMMENT_MARKER} \nold review")
+    others = [mocker.Mock(body="a human comment"), mocker.Mock(body=None)]
+    pr.get_review_comments.return_value = [marked, others[0]]
+    pr.get_issue_comments.return_value = [others[1]]
+
+    GithubPullRequest(pr).reset_comments()
+
+    marked.delete.assert_called_once()
+    for comment in others:
+        comment.delete.assert_not_called()
+
+
+def test_gitlab_reset_comments_deletes_marked_notes(mocker):
+    """Tests that only notes starting with the marker are deleted, skipping notes without a body."""
+    mr = mocker.Mock()
+    discussion = mocker.Mock(
+        attributes={
+            "notes": [dict(id=1, body=f"{_COMMENT_MARKER} \nold"), dict(id=2, body="human"), dict(id=3, body=None)]
+        }
+    )
+    mr.discussions.list.return_value = [discussion]
+
+    GitlabMergeRequest(mr).reset_comments()
+
+    discussion.notes.delete.assert_called_once_with(1)
+
+
+def test_gitlab_create_comment_fetches_commit_once(mocker):
+    """Tests that a line comment is positioned on the latest diff after a single commit lookup."""
+    sleep = mocker.patch("patchwork.common.client.scm.time.sleep")
+    mr = mocker.Mock(web_url="https://gitlab.com/org/repo/-/merge_requests/1")
+    mr.commits.return_value.next.return_value.get_id.return_value = "head"
+    mr.diffs.list.return_value.next.return_value = mocker.Mock(base_commit_sha="base", head_commit_sha="head")
+    mr.discussions.create.return_value.attributes = {"notes": [dict(id=5)]}
+
+    note = GitlabMergeRequest(mr).create_comment("looks off", path="src/app.py", start_line=1, end_line=2)
+
+    assert note == "#note_5"
+    mr.commits.assert_called_once()
+    sleep.assert_not_called()
+    assert mr.discussions.create.call_args.args[0]["position"]["head_sha"] == "head"
+
+
+@pytest.mark.parametrize(
+    "client_class,url,expected",
+    [
+        (GithubClient, "https://github.com/org/repo/issues/12", ("org/repo", 12)),
+        (GithubClient, "https://github.com/org/repo/pull/3", ("org/repo", 3)),
+        (GithubClient, "org/repo/issues/12", None),
+        (GithubClient, "https://github.com/org/repo/issues/abc", None),
+        (GitlabClient, "https://gitlab.com/org/repo/-/issues/12", ("org/repo", 12)),
+        (GitlabClient, "https://gitlab.com/org/repo/-/merge_requests/7", ("org/repo", 7)),
+        (GitlabClient, "org/repo/issues/12", None),
+    ],
+)
+def test_get_slug_and_id_from_url(client_class, url, expected):
+    """Tests that the repository slug and the issue or pull request id are read from the end of the url."""
+    assert client_class("token").get_slug_and_id_from_url(url) == expected
+
+
+def test_github_client_reuses_repo_per_slug(mocker):
+    """Tests that a repository is retrieved once per slug across operations."""
+    client = GithubClient("token")
+    github = mocker.patch.object(GithubClient, "github", new_callable=mocker.PropertyMock).return_value
+    github.get_repo.return_value.get_pulls.return_value = []
+
+    client.find_prs("org/repo")
+    client.find_prs("org/repo")
+    client.find_prs("org/other")
+
+    assert [call.args for call in github.get_repo.call_args_list] == [("org/repo",), ("org/other",)]
+
+
+def test_gitlab_client_reuses_project_per_slug(mocker):
+    """Tests that a project is retrieved once per slug across operations."""
+    client = GitlabClient("token")
+    gitlab = mocker.patch.object(GitlabClient, "gitlab", new_callable=mocker.PropertyMock).return_value
+    gitlab.projects.get.return_value.mergerequests.list.return_value = []
+
+    client.find_prs("org/repo")
+    client.find_prs("org/repo")
+
+    gitlab.projects.get.assert_called_once_with("org/repo")
+
+
+def test_gitlab_find_prs_lists_each_state_without_unset_filters(mocker):
+    """Tests that merge requests are listed once per GitLab state with only the filters that were given."""
+    client = GitlabClient("token")
+    gitlab = mocker.patch.object(GitlabClient, "gitlab", new_callable=mocker.PropertyMock).return_value
+    mergerequests = gitlab.projects.get.return_value.mergerequests
+    mergerequests.list.side_effect = [["closed"], ["merged"]]
+
+    mrs = client.find_prs("org/repo", state=PullRequestState.CLOSED, original_branch="main")
+
+    assert [mr._mr for mr in mrs] == ["closed", "merged"]
+    assert mergerequests.list.call_args_list == [
+        mocker.call(per_page=100, iterator=True, state="closed", target_branch="main"),
+        mocker.call(per_page=100, iterator=True, state="merged", target_branch="main"),
+    ]
+
+
+def test_gitlab_find_prs_stops_listing_at_limit(mocker):
+    """Tests that pages and listings past the limit are not fetched."""
+    client = GitlabClient("token")
+    gitlab = mocker.patch.object(GitlabClient, "gitlab", new_callable=mocker.PropertyMock).return_value
+    mergerequests = gitlab.projects.get.return_value.mergerequests
+    closed = iter(["first", "second", "third"])
+    mergerequests.list.return_value = closed
+
+    mrs = client.find_prs("org/repo", state=PullRequestState.CLOSED, limit=2)
+
+    assert [mr._mr for mr in mrs] == ["first", "second"]
+    assert next(closed) == "third"
+    mergerequests.list.assert_called_once_with(per_page=100, iterator=True, state="closed")
+
+
+@pytest.mark.parametrize(
+    "client_class,connection,cached_connection",
+    [(GithubClient, "Github", _cached_github), (GitlabClient, "Gitlab", _cached_gitlab)],
+)
+def test_clients_share_connection_per_token(mocker, client_class, connection, cached_connection):
+    """Tests that clients created with the same url and token share one connection."""
+    cached_connection.cache_clear()
+    factory = mocker.patch(f"patchwork.common.client.scm.{connection}", side_effect=lambda *_, **__: mocker.Mock())
+
+    first = getattr(client_class("token"), connection.lower())
+    second = getattr(client_class("token"), connection.lower())
+    other = getattr(client_class("other"), connection.lower())
+
+    assert first is second
+    assert other is not first
+    assert factory.call_count == 2
+    cached_connection.cache_clear()
+
+
+def test_github_create_review_comments_look_up_first_commit_once(mocker):
+    """Tests that review comments on several lines share one lookup of the first commit."""
+    pr = mocker.Mock(html_url=_PR_URL)
+    first_commit = mocker.Mock()
+    pr.get_commits.return_value = [first_commit, mocker.Mock()]
+    pull_request = GithubPullRequest(pr)
+
+    pull_request.create_comment("first", path="src/app.py", start_line=1, end_line=2)
+    pull_request.create_comment("second", path="src/app.py", end_line=9)
+
+    pr.get_commits.assert_called_once()
+    assert [call.kwargs["commit"] for call in pr.create_review_comment.call_args_list] == [first_commit] * 2
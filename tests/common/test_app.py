@@ -1,7 +1,19 @@
+import json
+import os
+from pathlib import Path
+
 import pytest
+import yaml
 from click.testing import CliRunner
 
-from patchwork.app import cli, find_patchflow
+from patchwork.app import (
+    _BUILTIN_PATCHFLOWS,
+    _PATCHFLOW_MODULE_CACHE,
+    _get_file_names,
+    _get_patchflow_names,
+    cli,
+    find_patchflow,
+)
 
 
 @pytest.fixture
@@ -13,6 +25,7 @@ def config_dir(tmp_path):
     
     Returns:
         Path: The path to the newly created configuration directory.
+    """
     config_dir = tmp_path / "config"
     config_dir.mkdir(parents=True, exist_ok=True)
     return config_dir
@@ -105,6 +118,16 @@ ResolveIssue"""
     )
 
 
+def test_builtin_patchflows_registry():
+    """Tests that the built-in patchflow registry matches the patchflow directories in the package.
+
+    Returns:
+        None: This function asserts that no patchflow is missing from the registry.
+    """
+    patchflows_dir = Path(__file__).parents[2] / "patchwork" / "patchflows"
+    assert sorted(_get_patchflow_names(str(patchflows_dir))) == sorted(_BUILTIN_PATCHFLOWS)
+
+
 def test_config_list_option_callback(runner, config_dir, patchflow_file):
     """Tests the behavior of the list option in the configuration callback for the CLI.
     
@@ -134,6 +157,45 @@ ResolveIssue
     )
 
 
+def test_config_list_option_callback_deduplicates(runner, config_dir):
+    """Tests that a custom patchflow shadowing a default patchflow is only listed once.
+
+    Args:
+        runner (CliRunner): The test runner used to invoke the CLI command.
+        config_dir (Path): The directory path where the configuration files are located.
+
+    Returns:
+        None: This function asserts that the shadowed patchflow is listed once.
+    """
+    (config_dir / "AutoFix").mkdir()
+    (config_dir / "AutoFix" / "AutoFix.py").touch()
+
+    result = runner.invoke(cli, ["--list", "--config", str(config_dir)])
+    assert result.exit_code == 0
+    assert result.output.split().count("AutoFix") == 1
+
+
+def test_config_list_option_callback_follows_symlinks(runner, tmp_path, config_dir):
+    """Tests that patchflow directories symlinked into the config directory are listed.
+
+    Args:
+        runner (CliRunner): The test runner used to invoke the CLI command.
+        tmp_path (Path): The temporary path in which the real patchflow directory is created.
+        config_dir (Path): The directory path where the configuration files are located.
+
+    Returns:
+        None: This function asserts that the linked patchflow is listed.
+    """
+    real_dir = tmp_path / "real"
+    real_dir.mkdir()
+    (real_dir / "linked.py").touch()
+    (config_dir / "linked").symlink_to(real_dir, target_is_directory=True)
+
+    result = runner.invoke(cli, ["--list", "--config", str(config_dir)])
+    assert result.exit_code == 0
+    assert result.output.strip().splitlines()[-1] == "linked"
+
+
 def test_cli_success(runner, config_dir, patchflow_file):
     """Tests the command-line interface (CLI) for successful execution of the 'noop' command.
     
@@ -159,6 +221,106 @@ class noop:
     assert result.exit_code == 0
 
 
+@pytest.mark.parametrize("has_config", [True, False])
+@pytest.mark.parametrize("has_prompt", [True, False])
+def test_cli_config_dir(runner, config_dir, patchflow_dir, patchflow_file, has_config, has_prompt):
+    """Tests that the config directory branch picks up the patchflow file, config and prompt when present.
+
+    Args:
+        runner (CliRunner): The test runner used to invoke the CLI command.
+        config_dir (Path): The directory path for the configuration files.
+        patchflow_dir (Path): The patchflow directory inside the configuration directory.
+        patchflow_file (Path): The file path where the 'noop' class code will be written.
+        has_config (bool): Whether a config.yml is present in the patchflow directory.
+        has_prompt (bool): Whether a prompt.json is present in the patchflow directory.
+
+    Returns:
+        None: This function asserts the inputs received by the patchflow.
+    """
+    code = """\
+import json
+
+class noop:
+    def __init__(self, inputs):
+        with open("inputs.json", "w") as fp:
+            json.dump({key: str(value) for key, value in inputs.items()}, fp)
+    def run(self):
+        return dict()
+"""
+    patchflow_file.write_text(code)
+    if has_config:
+        (patchflow_dir / "config.yml").write_text("from_config: yes\n")
+    if has_prompt:
+        (patchflow_dir / "prompt.json").write_text("[]")
+
+    result = runner.invoke(cli, ["noop", "--config", str(config_dir), "--disable_telemetry"])
+
+    assert result.exit_code == 0
+    inputs = json.loads(Path("inputs.json").read_text())
+    assert ("from_config" in inputs) is has_config
+    if has_prompt:
+        assert inputs["prompt_template_file"] == str(patchflow_dir / "prompt.json")
+    else:
+        assert "prompt_template_file" not in inputs
+    assert str(patchflow_file) in _PATCHFLOW_MODULE_CACHE
+
+
+def test_get_file_names(patchflow_dir, patchflow_file):
+    """Tests that only the files directly inside a directory are returned.
+
+    Args:
+        patchflow_dir (Path): The directory to scan.
+        patchflow_file (Path): A file inside the directory.
+
+    Returns:
+        None: This function does not return a value; it only asserts conditions.
+    """
+    (patchflow_dir / "nested").mkdir()
+    (patchflow_dir / "config.yml").touch()
+
+    assert _get_file_names(str(patchflow_dir)) == {"noop.py", "config.yml"}
+    assert _get_file_names(str(patchflow_dir / "missing")) == set()
+
+
+@pytest.mark.parametrize("data_format", ["json", "yaml"])
+def test_cli_output(runner, config_dir, patchflow_file, data_format):
+    """Tests that the inputs are written to the output file in the requested format.
+
+    Args:
+        runner (CliRunner): The test runner used to invoke the CLI command.
+        config_dir (Path): The directory path for the configuration files.
+        patchflow_file (Path): The file path where the 'noop' class code will be written.
+        data_format (str): The format of the output file.
+
+    Returns:
+        None: This function asserts the content of the output file.
+    """
+    patchflow_file.write_text("class noop:\n    def __init__(self, inputs):\n        pass\n    def run(self):\n        pass\n")
+
+    result = runner.invoke(
+        cli,
+        [
+            "noop",
+            "--config",
+            str(config_dir),
+            "--disable_telemetry",
+            "--output",
+            "output.txt",
+            "--format",
+            data_format,
+            "--key=value",
+            "--flag",
+        ],
+    )
+
+    assert result.exit_code == 0
+    content = Path("output.txt").read_text()
+    if data_format == "json":
+        assert json.loads(content) == {"key": "value", "flag": True}
+    else:
+        assert yaml.safe_load(content) == {"key": "value", "flag": True}
+
+
 def test_cli_failure(runner):
     """Tests the command line interface (CLI) for handling failure when provided with a nonexistent configuration file.
     
@@ -213,3 +375,83 @@ class noop:
     # Check the output
     assert isinstance(patchflow, type)
     assert patchflow.__name__ == "noop"
+
+
+def test_config_find_module_cached(patchflow_file):
+    """Tests that finding a patchflow from an unchanged file reuses the loaded module.
+
+    Args:
+        patchflow_file (Path): The path to the file where the test code is written.
+
+    Returns:
+        None: This function does not return a value; it only asserts conditions.
+    """
+    patchflow_file.write_text("class noop:\n    pass\n")
+    module_path = str(patchflow_file.resolve())
+
+    first = find_patchflow([module_path], "noop")
+    second = find_patchflow([module_path], "noop")
+
+    assert first is not None
+    assert first is second
+
+
+def test_config_find_module_reloads_changed_file(patchflow_file):
+    """Tests that finding a patchflow from a modified file loads the new content.
+
+    Args:
+        patchflow_file (Path): The path to the file where the test code is written.
+
+    Returns:
+        None: This function does not return a value; it only asserts conditions.
+    """
+    patchflow_file.write_text("class noop:\n    version = 1\n")
+    module_path = str(patchflow_file.resolve())
+    first = find_patchflow([module_path], "noop")
+
+    patchflow_file.write_text("class noop:\n    version = 2\n")
+    stat = patchflow_file.stat()
+    os.utime(patchflow_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = find_patchflow([module_path], "noop")
+
+    assert first.version == 1
+    assert second.version == 2
+    assert _PATCHFLOW_MODULE_CACHE[module_path][1].noop is second
+
+
+def test_find_module_not_found(tmp_path):
+    """Tests that missing files, missing modules and missing attributes are skipped without raising.
+
+    Args:
+        tmp_path (Path): The temporary path in which the test files are created.
+
+    Returns:
+        None: This function does not return a value; it only asserts conditions.
+    """
+    empty_file = tmp_path / "empty.py"
+    empty_file.touch()
+
+    possible_module_paths = [
+        str(tmp_path / "missing.py"),
+        str(empty_file),
+        "nonexistent_patchwork_module",
+        "nonexistent_patchwork_package.module",
+        "json",
+    ]
+
+    assert find_patchflow(possible_module_paths, "noop") is None
+
+
+def test_config_find_module_error(patchflow_file):
+    """Tests that errors raised while loading a patchflow file are not hidden.
+
+    Args:
+        patchflow_file (Path): The path to the file where the test code is written.
+
+    Returns:
+        None: This function does not return a value; it only asserts conditions.
+    """
+    patchflow_file.write_text("raise RuntimeError('broken patchflow')\n")
+
+    with pytest.raises(RuntimeError, match="broken patchflow"):
+        find_patchflow([str(patchflow_file.resolve())], "noop")
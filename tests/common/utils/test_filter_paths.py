@@ -0,0 +1,61 @@
+import pytest
+
+from patchwork.common.utils.filter_paths import (
+    IGNORE_DIRS,
+    IGNORE_EXTS_GLOBS,
+    IGNORE_FILES_GLOBS,
+    PathFilter,
+)
+
+_IGNORED_GROKS = IGNORE_DIRS | IGNORE_EXTS_GLOBS | IGNORE_FILES_GLOBS
+
+
+@pytest.mark.parametrize(
+    "file,grok",
+    [
+        ("src/app.py", None),
+        ("src/app.pyc", "*.pyc"),
+        ("node_modules", "node_modules"),
+        ("node_modules/lib/index.js", "node_modules"),
+        ("requirements.txt", "requirements.txt"),
+        ("src/requirements.txt", None),
+        ("dist/pkg.egg-info/PKG-INFO", "*.egg-info"),
+    ],
+)
+def test_get_grok_ignored(tmp_path, file, grok):
+    """Tests that a path is ignored by the pattern matching the path or one of its parents."""
+    path_filter = PathFilter(base_path=tmp_path, ignored_groks=set(_IGNORED_GROKS))
+
+    assert path_filter.get_grok_ignored(file) == grok
+
+
+def test_get_grok_ignored_without_groks(tmp_path):
+    """Tests that nothing is ignored when there are no patterns."""
+    path_filter = PathFilter(base_path=tmp_path, ignored_groks=set())
+
+    assert path_filter.get_grok_ignored("src/app.pyc") is None
+
+
+@pytest.mark.parametrize(
+    "max_depth,file,depth",
+    [
+        (-1, "a/b/c/d.py", None),
+        (2, "a/b.py", None),
+        (2, "a/b/c.py", 3),
+        (0, "", None),
+    ],
+)
+def test_get_depth_ignored(tmp_path, max_depth, file, depth):
+    """Tests that files deeper than the maximum depth below the base path report their depth."""
+    path_filter = PathFilter(base_path=tmp_path, max_depth=max_depth)
+
+    assert path_filter.get_depth_ignored(tmp_path / file) == depth
+    assert path_filter.get_depth_ignored(str(tmp_path / file)) == depth
+
+
+def test_get_depth_ignored_outside_base_path(tmp_path):
+    """Tests that files outside of the base path, including siblings sharing its name as a prefix, are not ignored."""
+    path_filter = PathFilter(base_path=tmp_path, max_depth=1)
+
+    assert path_filter.get_depth_ignored(tmp_path.parent / "other" / "a" / "b.py") is None
+    assert path_filter.get_depth_ignored(f"{tmp_path}suffix/a/b.py") is None
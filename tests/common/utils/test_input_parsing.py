@@ -0,0 +1,29 @@
+import pytest
+
+from patchwork.common.utils.input_parsing import parse_to_list
+
+
+@pytest.mark.parametrize(
+    "input_value,expected",
+    [
+        ("", []),
+        ([], []),
+        ({}, []),
+        ("a, b ,,c", ["a", "b", "c"]),
+        ("a b,c d", ["a b", "c d"]),
+        ("a  b\tc", ["a", "b", "c"]),
+        ({"path": "a"}, ["a"]),
+        ([{"path": "a"}, " b ", {"other": "c"}], ["a", "b"]),
+        ((value for value in ("a", " ", "b")), ["a", "b"]),
+    ],
+)
+def test_parse_to_list(input_value, expected):
+    """Tests that strings are split on the first delimiter found and mappings and iterables are read by key."""
+    assert parse_to_list(input_value, possible_delimiters=[",", None], possible_keys=["path"]) == expected
+
+
+def test_parse_to_list_reads_every_key_of_every_item():
+    """Tests that iterable keys are read for each item and that each key with a value is kept."""
+    input_value = [{"path": "a", "file": "b"}, {"file": "c"}]
+
+    assert parse_to_list(input_value, possible_keys=iter(["path", "file"])) == ["a", "b", "c"]
@@ -0,0 +1,24 @@
+from patchwork.common.utils.progress_bar import PatchflowProgressBar
+
+
+class FirstStep:
+    def run(self):
+        return "first"
+
+
+class SecondStep:
+    def run(self):
+        return "second"
+
+
+def test_progress_advances_by_the_most_run_step(mocker):
+    """Tests that each step run advances the remaining progress split by the steps and their highest run count."""
+    progress_bar = PatchflowProgressBar(mocker.Mock())
+    update = mocker.Mock()
+    progress_bar.__dict__["_PatchflowProgressBar__progress_bar_update"] = update
+    progress_bar.register_steps(FirstStep, SecondStep)
+
+    assert [FirstStep().run(), FirstStep().run(), SecondStep().run()] == ["first", "first", "second"]
+
+    assert [call.kwargs["advance"] for call in update.call_args_list] == [50.0, 25.0, 6.25]
+    assert update.call_args.kwargs["description"] == "[bold green]Running SecondStep"